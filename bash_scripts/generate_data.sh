@@ -17,7 +17,7 @@ PROJECT_ROOT="$(dirname "$0")/.."
 cd "$PROJECT_ROOT/excel" || exit 1
 
 echo "📊 Running excel/generate_master.py..."
-python3 generate_master.py
+python3 generate_master.py "$@"
 
 if [ $? -eq 0 ]; then
     echo ""
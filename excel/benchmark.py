@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+GlamorByBee Generator Benchmarks
+Times each generator, each writer and the end-to-end run across a sweep of row counts,
+reporting wall time, throughput and peak memory for each case
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import queue as queues
+import resource
+import sys
+import tempfile
+import time
+import traceback
+import tracemalloc
+from datetime import datetime
+
+import generate_master
+
+# Scales multiply generate_master's default counts (50 customers, 100 appointments)
+DEFAULT_CUSTOMERS = generate_master.DEFAULT_CUSTOMERS
+DEFAULT_APPOINTMENTS = generate_master.DEFAULT_APPOINTMENTS
+SCALES = [10, 100, 1000]
+SEED = 1
+AS_OF = datetime(2025, 6, 1)
+STAGES = ["generators", "writers", "end_to_end", "memory"]
+
+
+def _timed(func, *args, **kwargs):
+    """Call func and return (seconds, result)"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def _count(records):
+    """Consume an iterable and return how many records it produced"""
+    return sum(1 for _ in records)
+
+
+def _tables(customers, appointments, backend="python"):
+    """Generate every table into lists, untimed, as input for the writer cases"""
+    data = {key: [] for key in generate_master.TABLE_NAMES}
+    config = generate_master.RunConfig(customers, appointments, SEED, AS_OF, backend=backend)
+    generate_master.generate_sharded({key: records.append for key, records in data.items()}, config)
+    return data
+
+
+def _rng(table):
+    return generate_master.table_rng(SEED, table)
+
+
+def _numpy_rng(table):
+    return generate_master.numpy_rng(SEED, table)
+
+
+# --- Generator cases ------------------------------------------------------------
+# Each case does its setup untimed and returns (seconds, rows) for the timed part.
+
+def gen_customers(customers, appointments):
+    return _timed(_count, generate_master.iter_customers(customers, _rng("customers"), as_of=AS_OF))
+
+
+def gen_addresses(customers, appointments):
+    records = list(generate_master.iter_customers(customers, _rng("customers"), as_of=AS_OF))
+    return _timed(_count, generate_master.iter_addresses(records, _rng("addresses")))
+
+
+def gen_appointments(customers, appointments):
+    customer_ids = generate_master.IdSequence(customers)
+    return _timed(_count, generate_master.iter_appointments(customer_ids, appointments, _rng("appointments"),
+                                                            as_of=AS_OF))
+
+
+def gen_invoices(customers, appointments):
+    records = list(generate_master.iter_appointments(generate_master.IdSequence(customers), appointments,
+                                                     _rng("appointments"), as_of=AS_OF))
+    return _timed(_count, generate_master.iter_invoices(records, _rng("invoices")))
+
+
+def gen_small_tables(customers, appointments):
+    config = generate_master.RunConfig(customers, appointments, SEED, AS_OF)
+
+    def build():
+        return sum(len(generate(_rng(table), config)) for table, generate in generate_master.SMALL_TABLES.items())
+    return _timed(build)
+
+
+def gen_analytics(customers, appointments):
+    data = _tables(customers, appointments)
+    config = generate_master.RunConfig(customers, appointments, SEED, generate_master.resolve_as_of(AS_OF))
+
+    def aggregate():
+        rollup = generate_master.AnalyticsRollup(config)
+        for table in ("appointments", "invoices"):
+            for record in data[table]:
+                rollup.add(table, record)
+        return len(data["appointments"]) + len(data["invoices"])
+    return _timed(aggregate)
+
+
+def gen_customers_numpy(customers, appointments):
+    # Includes turning the columns into records, which is what the writers consume
+    return _timed(lambda: _count(generate_master.customer_columns(customers, _numpy_rng("customers"),
+                                                                  as_of=AS_OF)))
+
+
+def gen_addresses_numpy(customers, appointments):
+    columns = generate_master.customer_columns(customers, _numpy_rng("customers"), as_of=AS_OF)
+    return _timed(lambda: _count(generate_master.address_columns(columns, _numpy_rng("addresses"))))
+
+
+def gen_appointments_numpy(customers, appointments):
+    return _timed(lambda: _count(generate_master.appointment_columns(customers, appointments,
+                                                                     _numpy_rng("appointments"), as_of=AS_OF)))
+
+
+def gen_invoices_numpy(customers, appointments):
+    columns = generate_master.appointment_columns(customers, appointments, _numpy_rng("appointments"), as_of=AS_OF)
+    return _timed(lambda: _count(generate_master.invoice_columns(columns, _numpy_rng("invoices"))))
+
+
+GENERATOR_CASES = {
+    "customers": gen_customers,
+    "addresses": gen_addresses,
+    "appointments": gen_appointments,
+    "invoices": gen_invoices,
+    "small_tables": gen_small_tables,
+    "analytics": gen_analytics,
+}
+NUMPY_GENERATOR_CASES = {
+    "customers_numpy": gen_customers_numpy,
+    "addresses_numpy": gen_addresses_numpy,
+    "appointments_numpy": gen_appointments_numpy,
+    "invoices_numpy": gen_invoices_numpy,
+}
+
+
+# --- Writer cases ---------------------------------------------------------------
+# Every table is generated untimed first; only writing it out is timed.
+
+def _total_rows(data):
+    return sum(len(records) for records in data.values())
+
+
+def write_xlsx_workbook(customers, appointments):
+    data = _tables(customers, appointments)
+    seconds, _ = _timed(generate_master.write_workbook, "bench.xlsx", data)
+    return seconds, _total_rows(data)
+
+
+def write_xlsx_column_widths(customers, appointments):
+    """The regular workbook's column-width scan on its own, over the appointments sheet"""
+    records = _tables(customers, appointments)["appointments"]
+    ws = generate_master.Workbook().active
+    headers = list(records[0].keys())
+    for record in records:
+        ws.append([record[header] for header in headers])
+    seconds, _ = _timed(generate_master.fit_column_widths, ws, headers, len(records))
+    return seconds, len(records)
+
+
+def write_xlsx_write_only(customers, appointments):
+    data = _tables(customers, appointments)
+
+    def write():
+        spools = {key: generate_master.SheetSpool() for key in data}
+        for key, records in data.items():
+            spools[key].add_all(records)
+        generate_master.write_spooled_workbook("bench.xlsx", spools)
+    seconds, _ = _timed(write)
+    return seconds, _total_rows(data)
+
+
+def _json_writer_case(json_format):
+    def case(customers, appointments):
+        data = _tables(customers, appointments)
+
+        def write():
+            filenames = {}
+            for key, records in data.items():
+                filenames[key] = generate_master.json_table_filename(key, json_format)
+                with generate_master.JsonTableWriter(filenames[key], key, json_format) as writer:
+                    writer.write_all(records)
+            generate_master.compose_master_json(filenames, f"{generate_master.JSON_DIR}/master_data.json",
+                                                json_format)
+        seconds, _ = _timed(write)
+        return seconds, _total_rows(data)
+    return case
+
+
+WRITER_CASES = {
+    "xlsx_workbook": write_xlsx_workbook,
+    "xlsx_column_widths": write_xlsx_column_widths,
+    "xlsx_write_only": write_xlsx_write_only,
+    **{f"json_{json_format}": _json_writer_case(json_format) for json_format in generate_master.JSON_FORMATS},
+}
+
+
+# --- End-to-end cases -----------------------------------------------------------
+# The public entry points, from nothing to files on disk. Rows are the customers and
+# appointments requested; the derived tables scale with them.
+
+def _end_to_end_case(func, *args, **kwargs):
+    def case(customers, appointments):
+        seconds, _ = _timed(func, *args, customers, appointments, seed=SEED, as_of=AS_OF, force=True, **kwargs)
+        return seconds, customers + appointments
+    return case
+
+
+END_TO_END_CASES = {
+    "xlsx_workbook": _end_to_end_case(generate_master.create_excel_file, "bench.xlsx"),
+    "xlsx_write_only": _end_to_end_case(generate_master.create_excel_file, "bench.xlsx", write_only=True),
+    "json": _end_to_end_case(generate_master.create_json_files),
+    "json_stream": _end_to_end_case(generate_master.create_json_files, stream=True),
+    "json_stream_compact": _end_to_end_case(generate_master.create_json_files, stream=True,
+                                            json_format="compact"),
+    "sqlite": _end_to_end_case(generate_master.create_sqlite_file, "bench.db"),
+}
+NUMPY_END_TO_END_CASES = {
+    "json_stream_numpy": _end_to_end_case(generate_master.create_json_files, stream=True, backend="numpy"),
+}
+
+
+# --- Memory cases ---------------------------------------------------------------
+# Every table held in lists, the way the non-streaming paths keep them. Timing covers
+# generation; what matters here is the peak and the bytes per row, which these cases
+# return as an extra result field.
+
+def _held_rows(convert=None):
+    def case(customers, appointments):
+        tracemalloc.start()
+        seconds, data = _timed(_tables, customers, appointments)
+        if convert:
+            data = {key: [convert(record) for record in records] for key, records in data.items()}
+        held, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rows = _total_rows(data)
+        return seconds, rows, {"bytes_per_row": round(held / rows)}
+    return case
+
+
+MEMORY_CASES = {
+    "rows_compact": _held_rows(),
+    "rows_dict": _held_rows(generate_master.as_dict),
+}
+
+
+class CaseFailed(Exception):
+    """A case raised or its process died; the message is the traceback or exit code"""
+
+
+def _child(queue, func, args, kwargs):
+    """Run one case inside a child process and report its timing, rows, peak RSS and any extra fields"""
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            seconds, rows, *extra = func(*args, **kwargs)
+    except BaseException:
+        queue.put((False, traceback.format_exc()))
+        return
+    queue.put((True, (seconds, rows, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, extra[0] if extra else {})))
+
+
+def run_isolated(func, *args, **kwargs):
+    """Run func in a fresh process so each case gets its own memory peak; returns (seconds, rows, peak KB, extra).
+    
+    Raises CaseFailed if the case raises, or if its process dies without reporting (killed
+    for running out of memory, say).
+    """
+    ctx = multiprocessing.get_context("fork")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_child, args=(queue, func, args, kwargs))
+    process.start()
+    while True:
+        # Checked before waiting: a process that has exited has already flushed what it put
+        alive = process.is_alive()
+        try:
+            ok, result = queue.get(timeout=1)
+            break
+        except queues.Empty:
+            if not alive:
+                process.join()
+                raise CaseFailed(f"process exited with code {process.exitcode} without a result")
+    process.join()
+    if not ok:
+        raise CaseFailed(result)
+    return result
+
+
+def numpy_available():
+    try:
+        generate_master._numpy()
+    except SystemExit:
+        return False
+    return True
+
+
+def stage_cases(stage):
+    """The cases a stage runs, given which optional dependencies are installed"""
+    if stage == "generators":
+        return {**GENERATOR_CASES, **(NUMPY_GENERATOR_CASES if numpy_available() else {})}
+    if stage == "writers":
+        cases = dict(WRITER_CASES)
+        if not generate_master.excel_available():
+            cases = {name: case for name, case in cases.items() if not name.startswith("xlsx")}
+        return cases
+    if stage == "memory":
+        return MEMORY_CASES
+    cases = {**END_TO_END_CASES, **(NUMPY_END_TO_END_CASES if numpy_available() else {})}
+    if not generate_master.excel_available():
+        # create_excel_file falls back to JSON without openpyxl, which isn't what is being measured
+        cases = {name: case for name, case in cases.items() if not name.startswith("xlsx")}
+    return cases
+
+
+def run_benchmarks(stages, scales, cases=None):
+    """Run every selected case at every scale; returns a list of result dicts"""
+    results = []
+    for stage in stages:
+        print(f"\n{stage}:")
+        for scale in scales:
+            customers, appointments = DEFAULT_CUSTOMERS * scale, DEFAULT_APPOINTMENTS * scale
+            for name, case in stage_cases(stage).items():
+                if cases and name not in cases:
+                    continue
+                try:
+                    seconds, rows, peak_kb, extra = run_isolated(case, customers, appointments)
+                except CaseFailed as error:
+                    message = str(error).strip()
+                    print(f"  {name:<22} {scale:>5}×  ❌ failed: {message.splitlines()[-1]}")
+                    print(message, file=sys.stderr)
+                    results.append({
+                        "stage": stage,
+                        "case": name,
+                        "scale": scale,
+                        "customers": customers,
+                        "appointments": appointments,
+                        "error": message,
+                    })
+                    continue
+                results.append({
+                    "stage": stage,
+                    "case": name,
+                    "scale": scale,
+                    "customers": customers,
+                    "appointments": appointments,
+                    "rows": rows,
+                    "seconds": round(seconds, 4),
+                    "rows_per_sec": round(rows / seconds) if seconds else None,
+                    "peak_rss_mb": round(peak_kb / 1024, 1),
+                    **extra,
+                })
+                print(f"  {name:<22} {scale:>5}×  {rows:>10,} rows  {seconds:9.3f} s  "
+                      f"{rows / max(seconds, 1e-9):>12,.0f} rows/s  {peak_kb / 1024:8.1f} MB"
+                      + "".join(f"  {value:,} {field.replace('_', ' ')}" for field, value in extra.items()))
+    return results
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark the GlamorByBee data generator")
+    parser.add_argument("--scales", type=int, nargs="+", default=SCALES,
+                        help="multiples of the default 50 customers / 100 appointments (default: 10 100 1000)")
+    parser.add_argument("--stages", choices=STAGES, nargs="+", default=STAGES,
+                        help="stages to run (default: all)")
+    parser.add_argument("--cases", nargs="+", help="only run cases with these names")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    cwd = os.getcwd()
+    output = os.path.abspath(args.output) if args.output else None
+    with tempfile.TemporaryDirectory() as workdir:
+        # Every output and the manifest go in the temp dir, not the repo's excel/ and json/
+        generate_master.set_output_dir(workdir)
+        os.chdir(workdir)
+        try:
+            results = run_benchmarks(args.stages, args.scales, args.cases)
+        finally:
+            os.chdir(cwd)
+
+    if output:
+        with open(output, "w") as f:
+            json.dump({
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "results": results,
+            }, f, indent=2)
+        print(f"\n✅ Results written: {output}")
+    failed = sum(1 for result in results if "error" in result)
+    if failed:
+        raise SystemExit(f"❌ {failed} cases failed")
+
+
+if __name__ == "__main__":
+    main()
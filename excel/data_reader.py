@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+GlamorByBee Data Reader
+Random access to the generated JSON Lines tables: fetch records by id, or scan a date
+range, decoding only the records asked for
+"""
+
+import argparse
+import json
+import mmap
+import os
+
+from generate_master import JSON_DIR, OFFSET_ENTRY, OFFSET_INDEXES, json_table_filename, offset_index_filename
+
+# Where generate_master.py writes the JSON files by default, wherever either is run from
+DEFAULT_DIR = JSON_DIR
+
+
+class OffsetIndex:
+    """A byte-offset index file, memory-mapped and binary searched in place"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, "rb") as f:
+            self.header = json.loads(f.readline())
+            self._start = f.tell()
+            size = os.fstat(f.fileno()).st_size
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.count = self.header["count"]
+        self._width = self.header["key_width"]
+        self._entry_size = self._width + OFFSET_ENTRY.size
+
+    def key(self, i):
+        start = self._start + i * self._entry_size
+        return self._map[start:start + self._width].rstrip(b"\0").decode()
+
+    def offset(self, i):
+        return OFFSET_ENTRY.unpack_from(self._map, self._start + i * self._entry_size + self._width)[0]
+
+    def _bisect(self, key, right=False):
+        """First entry whose key is above key (right=True) or not below it"""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            probe = self.key(middle)
+            if probe < key or right and probe == key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def offsets(self, low=None, high=None):
+        """Offsets of the records with low <= key <= high (either bound may be None), in key order"""
+        start = 0 if low is None else self._bisect(low)
+        stop = self.count if high is None else self._bisect(high, right=True)
+        return [self.offset(i) for i in range(start, stop)]
+
+    def close(self):
+        if self._map:
+            self._map.close()
+
+
+class DataReader:
+    """Read records from a run's .jsonl tables through their byte-offset indexes.
+    
+    Tables and indexes are memory-mapped as they are first used, so a lookup costs a
+    binary search and the decoding of the records it returns, whatever the file size.
+    Write them with: generate_master.py --stream --json-format jsonl
+    """
+
+    def __init__(self, json_dir=DEFAULT_DIR):
+        self.json_dir = json_dir
+        self._files = []
+        self._tables = {}
+        self._indexes = {}
+
+    def _table(self, table):
+        if table not in self._tables:
+            filename = os.path.join(self.json_dir, os.path.basename(json_table_filename(table, "jsonl")))
+            f = open(filename, "rb")
+            self._files.append(f)
+            # An empty file can't be mapped, and has nothing to map
+            size = os.fstat(f.fileno()).st_size
+            self._tables[table] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        return self._tables[table]
+
+    def _index(self, table, field):
+        if (table, field) not in self._indexes:
+            index = OffsetIndex(offset_index_filename(table, field, os.path.join(self.json_dir, "indexes")))
+            if index.header["data_bytes"] != len(self._table(table)):
+                index.close()
+                raise ValueError(f"{index.filename} is out of date with {table}.jsonl; "
+                                 "regenerate with --stream --json-format jsonl")
+            self._indexes[table, field] = index
+        return self._indexes[table, field]
+
+    def _fields(self, table):
+        if table not in OFFSET_INDEXES:
+            raise ValueError(f"{table} has no offset indexes; one of {', '.join(OFFSET_INDEXES)}")
+        return OFFSET_INDEXES[table]
+
+    def record_at(self, table, offset):
+        """Decode the record starting at a byte offset of a table"""
+        data = self._table(table)
+        end = data.find(b"\n", offset)
+        return json.loads(data[offset:end if end >= 0 else len(data)])
+
+    def get(self, table, record_id):
+        """The record with this id (customer_id, appointment_id or invoice_id); KeyError if there is none"""
+        offsets = self._index(table, self._fields(table)[0]).offsets(record_id, record_id)
+        if not offsets:
+            raise KeyError(record_id)
+        return self.record_at(table, offsets[0])
+
+    def scan(self, table, start=None, end=None):
+        """Yield the records dated start to end inclusive (YYYY-MM-DD; None is open-ended), in date order"""
+        date_field = self._fields(table)[1]
+        if date_field is None:
+            raise ValueError(f"{table} has no date index")
+        for offset in self._index(table, date_field).offsets(start, end):
+            yield self.record_at(table, offset)
+
+    def records(self, table):
+        """Yield every record of a table in file order"""
+        data = self._table(table)
+        start = 0
+        while start < len(data):
+            end = data.find(b"\n", start)
+            if end < 0:
+                end = len(data)
+            yield json.loads(data[start:end])
+            start = end + 1
+
+    def close(self):
+        for index in self._indexes.values():
+            index.close()
+        for data in self._tables.values():
+            if data:
+                data.close()
+        for f in self._files:
+            f.close()
+        self._indexes.clear()
+        self._tables.clear()
+        self._files.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main(argv=None):
+    """Command-line entry point: print the requested records, one per line"""
+    parser = argparse.ArgumentParser(description="Look up records in the generated GlamorByBee JSON Lines tables")
+    parser.add_argument("table", choices=OFFSET_INDEXES)
+    parser.add_argument("ids", nargs="*", help="ids to fetch (default: scan --from/--to)")
+    parser.add_argument("--from", dest="start", help="first date of the scan, YYYY-MM-DD")
+    parser.add_argument("--to", dest="end", help="last date of the scan, YYYY-MM-DD")
+    parser.add_argument("--json-dir", default=DEFAULT_DIR, help="directory of the .jsonl tables (default: json/)")
+    args = parser.parse_args(argv)
+
+    with DataReader(args.json_dir) as reader:
+        if args.ids:
+            records = []
+            for record_id in args.ids:
+                try:
+                    records.append(reader.get(args.table, record_id))
+                except KeyError:
+                    parser.exit(1, f"{args.table}: no record {record_id}\n")
+        else:
+            records = reader.scan(args.table, args.start, args.end)
+        for record in records:
+            print(json.dumps(record))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,21 +4,53 @@ GlamorByBee Master Data Generator
 Generates Excel file with dummy data for testing
 """
 
+import argparse
+import gzip
+import hashlib
+import heapq
 import json
-from datetime import datetime, timedelta
+import marshal
+import os
+import re
+import shutil
+import struct
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import deque
+from collections.abc import Sequence
+from contextlib import ExitStack, contextmanager, nullcontext
+from dataclasses import asdict, dataclass
+from functools import cache, partial
+from itertools import groupby, islice
+from datetime import date, datetime, timedelta
+from operator import attrgetter, itemgetter
+from bisect import bisect_right
 import random
 
-# Try to import openpyxl, if not available, provide instructions
 try:
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, PatternFill, Alignment
-    from openpyxl.utils import get_column_letter
-except ImportError:
-    print("openpyxl not installed. Install with: pip install openpyxl")
-    print("Generating JSON data files instead...")
-    EXCEL_AVAILABLE = False
-else:
-    EXCEL_AVAILABLE = True
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+@cache
+def excel_available():
+    """Import openpyxl on first use, so runs that write no workbook start without it.
+    
+    Returns False, after saying how to install it, if it isn't available.
+    """
+    global Workbook, load_workbook, WriteOnlyCell, Font, PatternFill, Alignment, get_column_letter
+    try:
+        from openpyxl import Workbook, load_workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, PatternFill, Alignment
+        from openpyxl.utils import get_column_letter
+    except ImportError:
+        print("openpyxl not installed. Install with: pip install openpyxl")
+        return False
+    return True
 
 
 # Sample data
@@ -43,116 +75,317 @@ CITIES = ["Dallas", "Plano", "Frisco", "McKinney", "Allen", "Richardson", "Carro
 
 STATUSES = ["confirmed", "pending", "completed", "cancelled"]
 PAYMENT_METHODS = ["cash", "credit_card", "debit_card", "venmo", "zelle"]
+CONTACT_METHODS = ["email", "phone", "text"]
+CUSTOMER_NOTES = ["VIP client", "Referred by friend", "Social media", "Walk-in", "Regular client", ""]
+APPOINTMENT_NOTES = ["", "Allergic to latex", "Brings own brushes", "Prefers natural look", "Rush service"]
+INVOICE_DISCOUNTS = [0, 0, 0, 10, 25, 50]
+
+DEFAULT_CUSTOMERS = 50
+DEFAULT_APPOINTMENTS = 100
+OUTPUT_FORMATS = ["xlsx", "json", "sqlite"]
+# Where outputs go: the workbook, database and manifest in excel/, the JSON files in json/
+# next to it, whichever directory the script is run from (see set_output_dir)
+OUTPUT_DIR = os.path.dirname(os.path.abspath(__file__))
+JSON_DIR = os.path.normpath(os.path.join(OUTPUT_DIR, "..", "json"))
+MANIFEST_FILE = "generate_manifest.json"
+SHARD_SIZE = 50000
+TABLE_NAMES = ["customers", "addresses", "appointments", "products", "invoices",
+               "staff", "analytics", "inventory", "schedule", "settings"]
+
+# Bump whenever a generator's output changes, so cached files are regenerated
+GENERATOR_VERSION = 5
+
+
+# --- Row types ------------------------------------------------------------------
+# The big tables are held as slotted objects rather than dicts: about a third of the memory
+# per row, as the field names live once on the class. They read like the dicts they replace
+# (record["status"], get(), keys(), items()), so writers and indexes take either; to_dict()
+# makes the real dict at the serialization boundary. Categorical values (statuses, cities,
+# services, dates, times...) are shared or interned strings rather than a copy per row.
+
+class Record:
+    """Base for compact table rows"""
+    __slots__ = ()
+
+    def __getitem__(self, field):
+        try:
+            return getattr(self, field)
+        except AttributeError:
+            raise KeyError(field) from None
+
+    def __setitem__(self, field, value):
+        setattr(self, field, value)
+
+    def get(self, field, default=None):
+        return getattr(self, field, default)
+
+    def keys(self):
+        return self.__slots__
+
+    def values(self):
+        return self._values(self)
+
+    def items(self):
+        return zip(self.__slots__, self._values(self))
+
+    def to_dict(self):
+        return dict(zip(self.__slots__, self._values(self)))
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.values() == other.values()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def __reduce__(self):
+        # Pickle as the bare values (for pool workers), not a field-name dict per row
+        return type(self), self.values()
+
+
+def as_dict(record):
+    """A record as a plain dict, whichever form it is in"""
+    return record.to_dict() if isinstance(record, Record) else record
+
+
+class Customer(Record):
+    __slots__ = ("customer_id", "first_name", "last_name", "email", "phone", "date_registered", "total_visits",
+                 "loyalty_points", "preferred_contact", "notes")
+    _values = attrgetter(*__slots__)
+
+    def __init__(self, customer_id, first_name, last_name, email, phone, date_registered, total_visits,
+                 loyalty_points, preferred_contact, notes):
+        self.customer_id = customer_id
+        self.first_name = first_name
+        self.last_name = last_name
+        self.email = email
+        self.phone = phone
+        self.date_registered = date_registered
+        self.total_visits = total_visits
+        self.loyalty_points = loyalty_points
+        self.preferred_contact = preferred_contact
+        self.notes = notes
+
+
+class Address(Record):
+    __slots__ = ("address_id", "customer_id", "address_type", "street_address", "apt_unit", "city", "state",
+                 "zip_code", "is_default")
+    _values = attrgetter(*__slots__)
+
+    def __init__(self, address_id, customer_id, address_type, street_address, apt_unit, city, state, zip_code,
+                 is_default):
+        self.address_id = address_id
+        self.customer_id = customer_id
+        self.address_type = address_type
+        self.street_address = street_address
+        self.apt_unit = apt_unit
+        self.city = city
+        self.state = state
+        self.zip_code = zip_code
+        self.is_default = is_default
+
+
+class Appointment(Record):
+    __slots__ = ("appointment_id", "customer_id", "staff_id", "service_name", "appointment_date",
+                 "appointment_time", "duration_minutes", "location", "status", "deposit_paid", "total_amount",
+                 "balance_due", "payment_method", "notes")
+    _values = attrgetter(*__slots__)
+
+    def __init__(self, appointment_id, customer_id, staff_id, service_name, appointment_date, appointment_time,
+                 duration_minutes, location, status, deposit_paid, total_amount, balance_due, payment_method,
+                 notes):
+        self.appointment_id = appointment_id
+        self.customer_id = customer_id
+        self.staff_id = staff_id
+        self.service_name = service_name
+        self.appointment_date = appointment_date
+        self.appointment_time = appointment_time
+        self.duration_minutes = duration_minutes
+        self.location = location
+        self.status = status
+        self.deposit_paid = deposit_paid
+        self.total_amount = total_amount
+        self.balance_due = balance_due
+        self.payment_method = payment_method
+        self.notes = notes
+
+
+class Invoice(Record):
+    __slots__ = ("invoice_id", "appointment_id", "customer_id", "invoice_date", "due_date", "subtotal", "tax_rate",
+                 "tax_amount", "discount", "total_amount", "amount_paid", "balance", "payment_status",
+                 "payment_date", "payment_method")
+    _values = attrgetter(*__slots__)
+
+    def __init__(self, invoice_id, appointment_id, customer_id, invoice_date, due_date, subtotal, tax_rate,
+                 tax_amount, discount, total_amount, amount_paid, balance, payment_status, payment_date,
+                 payment_method):
+        self.invoice_id = invoice_id
+        self.appointment_id = appointment_id
+        self.customer_id = customer_id
+        self.invoice_date = invoice_date
+        self.due_date = due_date
+        self.subtotal = subtotal
+        self.tax_rate = tax_rate
+        self.tax_amount = tax_amount
+        self.discount = discount
+        self.total_amount = total_amount
+        self.amount_paid = amount_paid
+        self.balance = balance
+        self.payment_status = payment_status
+        self.payment_date = payment_date
+        self.payment_method = payment_method
+
+
+def customer_id(number):
+    """Format a customer id from its sequence number (interned: it is repeated in every related table)"""
+    return sys.intern(f"CUST{number:04d}")
+
+
+def clock_time(minutes):
+    """Format minutes after midnight as an interned HH:MM string"""
+    return sys.intern(f"{minutes // 60:02d}:{minutes % 60:02d}")
+
+
+class IdSequence(Sequence):
+    """Indexable view of ids like CUST0001..CUSTnnnn that never materialises the list"""
+
+    def __init__(self, count, start=1, format_id=customer_id):
+        self._numbers = range(start, start + count)
+        self._format_id = format_id
+
+    def __len__(self):
+        return len(self._numbers)
+
+    def __getitem__(self, index):
+        return self._format_id(self._numbers[index])
+
+
+def iter_customers(count=50, rng=random, start=1, as_of=None):
+    """Yield customer records one at a time, numbered from start"""
+    now = as_of or datetime.now()
+    for i in range(start, start + count):
+        first_name = rng.choice(FIRST_NAMES)
+        last_name = rng.choice(LAST_NAMES)
+        yield Customer(
+            customer_id=customer_id(i),
+            first_name=first_name,
+            last_name=last_name,
+            email=f"{first_name.lower()}.{last_name.lower()}{i}@email.com",
+            phone=f"(214) {rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+            date_registered=sys.intern((now - timedelta(days=rng.randint(1, 365))).strftime("%Y-%m-%d")),
+            total_visits=rng.randint(1, 15),
+            loyalty_points=rng.randint(0, 500),
+            preferred_contact=rng.choice(CONTACT_METHODS),
+            notes=rng.choice(CUSTOMER_NOTES)
+        )
 
 
 def generate_customers(count=50):
     """Generate customer data"""
-    customers = []
-    for i in range(1, count + 1):
-        first_name = random.choice(FIRST_NAMES)
-        last_name = random.choice(LAST_NAMES)
-        customers.append({
-            "customer_id": f"CUST{i:04d}",
-            "first_name": first_name,
-            "last_name": last_name,
-            "email": f"{first_name.lower()}.{last_name.lower()}{i}@email.com",
-            "phone": f"(214) {random.randint(100, 999)}-{random.randint(1000, 9999)}",
-            "date_registered": (datetime.now() - timedelta(days=random.randint(1, 365))).strftime("%Y-%m-%d"),
-            "total_visits": random.randint(1, 15),
-            "loyalty_points": random.randint(0, 500),
-            "preferred_contact": random.choice(["email", "phone", "text"]),
-            "notes": random.choice(["VIP client", "Referred by friend", "Social media", "Walk-in", "Regular client", ""])
-        })
-    return customers
+    return list(iter_customers(count))
 
 
-def generate_addresses(customers):
-    """Generate address data linked to customers"""
-    addresses = []
-    for idx, customer in enumerate(customers, 1):
+def iter_addresses(customers, rng=random):
+    """Yield address records linked to customers, consuming customers lazily"""
+    address_count = 0
+    for customer in customers:
         # 80% of customers have home address, 20% have both home and billing
-        addresses.append({
-            "address_id": f"ADDR{idx:04d}",
-            "customer_id": customer["customer_id"],
-            "address_type": "home",
-            "street_address": f"{random.randint(100, 9999)} {random.choice(STREETS)}",
-            "apt_unit": random.choice(["", f"Apt {random.randint(1, 999)}", f"Suite {random.randint(100, 500)}"]),
-            "city": random.choice(CITIES),
-            "state": "TX",
-            "zip_code": f"75{random.randint(0, 9)}{random.randint(10, 99)}",
-            "is_default": True
-        })
+        address_count += 1
+        yield Address(
+            address_id=f"ADDR{address_count:04d}",
+            customer_id=customer["customer_id"],
+            address_type="home",
+            street_address=f"{rng.randint(100, 9999)} {rng.choice(STREETS)}",
+            apt_unit=sys.intern(rng.choice(["", f"Apt {rng.randint(1, 999)}", f"Suite {rng.randint(100, 500)}"])),
+            city=rng.choice(CITIES),
+            state="TX",
+            zip_code=sys.intern(f"75{rng.randint(0, 9)}{rng.randint(10, 99)}"),
+            is_default=True
+        )
         
         # 20% have separate billing address
-        if random.random() < 0.2:
-            addresses.append({
-                "address_id": f"ADDR{len(addresses) + 1:04d}",
-                "customer_id": customer["customer_id"],
-                "address_type": "billing",
-                "street_address": f"{random.randint(100, 9999)} {random.choice(STREETS)}",
-                "apt_unit": "",
-                "city": random.choice(CITIES),
-                "state": "TX",
-                "zip_code": f"75{random.randint(0, 9)}{random.randint(10, 99)}",
-                "is_default": False
-            })
-    
-    return addresses
+        if rng.random() < 0.2:
+            address_count += 1
+            yield Address(
+                address_id=f"ADDR{address_count:04d}",
+                customer_id=customer["customer_id"],
+                address_type="billing",
+                street_address=f"{rng.randint(100, 9999)} {rng.choice(STREETS)}",
+                apt_unit="",
+                city=rng.choice(CITIES),
+                state="TX",
+                zip_code=sys.intern(f"75{rng.randint(0, 9)}{rng.randint(10, 99)}"),
+                is_default=False
+            )
 
 
-def generate_appointments(customers, count=100):
-    """Generate appointment data"""
-    appointments = []
-    base_date = datetime.now() - timedelta(days=90)
-    
-    for i in range(1, count + 1):
-        customer = random.choice(customers)
-        service = random.choice(SERVICES)
-        appointment_date = base_date + timedelta(days=random.randint(0, 120))
-        hour = random.randint(7, 18)
+def generate_addresses(customers):
+    """Generate address data linked to customers"""
+    return list(iter_addresses(customers))
+
+
+def iter_appointments(customer_ids, count=100, rng=random, start=1, as_of=None, calendar=None):
+    """Yield appointment records numbered from start; customer_ids is any sequence (e.g. an IdSequence).
+    
+    Each appointment is booked into a free slot of calendar (an AvailabilityCalendar, by
+    default one with enough artists for count appointments).
+    """
+    now = as_of or datetime.now()
+    yesterday = now - timedelta(days=1)
+    base_date = now - timedelta(days=90)
+    calendar = calendar or AvailabilityCalendar.for_count(count, as_of=now, rng=rng)
+    
+    for i in range(start, start + count):
+        customer = sys.intern(rng.choice(customer_ids))
+        service = rng.choice(SERVICES)
+        offset, start_minute, lane = calendar.place(service["duration"])
+        appointment_date = base_date + timedelta(days=offset)
         
         # Determine status based on date
-        if appointment_date < datetime.now() - timedelta(days=1):
-            status = random.choice(["completed", "completed", "completed", "cancelled"])
-        elif appointment_date < datetime.now():
+        if appointment_date < yesterday:
+            status = rng.choice(["completed", "completed", "completed", "cancelled"])
+        elif appointment_date < now:
             status = "completed"
         else:
-            status = random.choice(["confirmed", "confirmed", "pending"])
+            status = rng.choice(["confirmed", "confirmed", "pending"])
         
-        appointments.append({
-            "appointment_id": f"APT{i:04d}",
-            "customer_id": customer["customer_id"],
-            "service_name": service["name"],
-            "appointment_date": appointment_date.strftime("%Y-%m-%d"),
-            "appointment_time": f"{hour:02d}:00",
-            "duration_minutes": service["duration"],
-            "location": random.choice(["studio", "studio", "studio", "home"]),
-            "status": status,
-            "deposit_paid": service["price"] * 0.30,
-            "total_amount": service["price"],
-            "balance_due": service["price"] * 0.70 if status != "completed" else 0,
-            "payment_method": random.choice(PAYMENT_METHODS) if status == "completed" else "",
-            "notes": random.choice(["", "Allergic to latex", "Brings own brushes", "Prefers natural look", "Rush service"])
-        })
-    
-    return appointments
+        yield Appointment(
+            appointment_id=f"APT{i:04d}",
+            customer_id=customer,
+            staff_id=artist_id(lane),
+            service_name=service["name"],
+            appointment_date=sys.intern(appointment_date.strftime("%Y-%m-%d")),
+            appointment_time=clock_time(start_minute),
+            duration_minutes=service["duration"],
+            location=rng.choice(["studio", "studio", "studio", "home"]),
+            status=status,
+            deposit_paid=service["price"] * 0.30,
+            total_amount=service["price"],
+            balance_due=service["price"] * 0.70 if status != "completed" else 0,
+            payment_method=rng.choice(PAYMENT_METHODS) if status == "completed" else "",
+            notes=rng.choice(APPOINTMENT_NOTES)
+        )
+
 
+def generate_appointments(customers, count=100):
+    """Generate appointment data"""
+    return list(iter_appointments([customer["customer_id"] for customer in customers], count))
 
-def generate_products():
+
+def generate_products(rng=random):
     """Generate product/service catalog"""
     products = []
     for idx, service in enumerate(SERVICES, 1):
         products.append({
             "product_id": f"PROD{idx:03d}",
             "service_name": service["name"],
-            "category": random.choice(["Bridal", "Special Event", "Everyday", "Educational"]),
+            "category": rng.choice(["Bridal", "Special Event", "Everyday", "Educational"]),
             "base_price": service["price"],
             "duration_minutes": service["duration"],
             "deposit_required": service["price"] * 0.30,
             "is_active": True,
             "description": f"Professional {service['name'].lower()} service",
-            "includes_lashes": random.choice([True, False]),
-            "includes_touch_up": random.choice([True, False])
+            "includes_lashes": rng.choice([True, False]),
+            "includes_touch_up": rng.choice([True, False])
         })
     
     # Add product sales items
@@ -182,37 +415,43 @@ def generate_products():
     return products
 
 
-def generate_invoices(appointments):
-    """Generate invoice data"""
-    invoices = []
-    completed_appointments = [apt for apt in appointments if apt["status"] == "completed"]
-    
-    for idx, apt in enumerate(completed_appointments, 1):
+def iter_invoices(appointments, rng=random):
+    """Yield invoices for completed appointments, consuming appointments lazily"""
+    invoice_count = 0
+    for apt in appointments:
+        if apt["status"] != "completed":
+            continue
+        invoice_count += 1
         invoice_date = datetime.strptime(apt["appointment_date"], "%Y-%m-%d")
+        tax = round(apt["total_amount"] * 0.0825, 2)
+        discount = rng.choice(INVOICE_DISCOUNTS)
         
-        invoices.append({
-            "invoice_id": f"INV{idx:05d}",
-            "appointment_id": apt["appointment_id"],
-            "customer_id": apt["customer_id"],
-            "invoice_date": apt["appointment_date"],
-            "due_date": (invoice_date + timedelta(days=15)).strftime("%Y-%m-%d"),
-            "subtotal": apt["total_amount"],
-            "tax_rate": 8.25,
-            "tax_amount": round(apt["total_amount"] * 0.0825, 2),
-            "discount": random.choice([0, 0, 0, 10, 25, 50]),
-            "total_amount": round(apt["total_amount"] * 1.0825, 2),
-            "amount_paid": round(apt["total_amount"] * 1.0825, 2),
-            "balance": 0,
-            "payment_status": "paid",
-            "payment_date": apt["appointment_date"],
-            "payment_method": apt["payment_method"]
-        })
-    
-    return invoices
+        yield Invoice(
+            invoice_id=f"INV{invoice_count:05d}",
+            appointment_id=apt["appointment_id"],
+            customer_id=apt["customer_id"],
+            invoice_date=apt["appointment_date"],
+            due_date=sys.intern((invoice_date + timedelta(days=15)).strftime("%Y-%m-%d")),
+            subtotal=apt["total_amount"],
+            tax_rate=8.25,
+            tax_amount=tax,
+            discount=discount,
+            total_amount=round(apt["total_amount"] + tax - discount, 2),
+            amount_paid=round(apt["total_amount"] + tax - discount, 2),
+            balance=0,
+            payment_status="paid",
+            payment_date=apt["appointment_date"],
+            payment_method=apt["payment_method"]
+        )
+
+
+def generate_invoices(appointments):
+    """Generate invoice data"""
+    return list(iter_invoices(appointments))
 
 
-def generate_staff():
-    """Generate staff/employee data"""
+def generate_staff(artists=1, rng=random):
+    """Generate staff/employee data, with extra makeup artists when the bookings need them"""
     staff = [
         {
             "staff_id": "STAFF001",
@@ -239,38 +478,36 @@ def generate_staff():
             "hourly_rate": 45.00
         }
     ]
+    
+    for lane in range(2, artists + 1):
+        first_name = rng.choice(FIRST_NAMES)
+        last_name = rng.choice(LAST_NAMES)
+        staff.append({
+            "staff_id": artist_id(lane),
+            "first_name": first_name,
+            "last_name": last_name,
+            "role": "Makeup Artist",
+            "email": f"{first_name.lower()}.{last_name.lower()}{lane}@glamorbybee.com",
+            "phone": f"(214) 555-{rng.randint(1000, 9999)}",
+            "hire_date": (datetime(2023, 3, 1) + timedelta(days=rng.randint(0, 600))).strftime("%Y-%m-%d"),
+            "is_active": True,
+            "specialties": rng.choice(["Bridal", "Special Event", "Everyday", "Editorial"]),
+            "hourly_rate": 45.00
+        })
     return staff
 
 
-def generate_analytics():
-    """Generate analytics/metrics data"""
-    analytics = []
-    base_date = datetime.now() - timedelta(days=90)
-    
-    for i in range(90):
-        date = base_date + timedelta(days=i)
-        # More bookings on weekends
-        is_weekend = date.weekday() >= 5
-        base_bookings = random.randint(8, 15) if is_weekend else random.randint(3, 8)
-        
-        analytics.append({
-            "date": date.strftime("%Y-%m-%d"),
-            "total_bookings": base_bookings,
-            "completed_bookings": int(base_bookings * random.uniform(0.85, 0.95)),
-            "cancelled_bookings": random.randint(0, 2),
-            "no_shows": random.randint(0, 1),
-            "total_revenue": round(base_bookings * random.uniform(150, 300), 2),
-            "new_clients": random.randint(0, 3),
-            "returning_clients": base_bookings - random.randint(0, 3),
-            "average_service_value": round(random.uniform(150, 300), 2),
-            "deposit_collected": round(base_bookings * random.uniform(45, 90), 2),
-            "tips_received": round(base_bookings * random.uniform(10, 30), 2)
-        })
-    
-    return analytics
+def generate_analytics(appointments, invoices, as_of=None):
+    """Generate analytics/metrics data by aggregating appointments and invoices per day"""
+    rollup = AnalyticsRollup(RunConfig(as_of=resolve_as_of(as_of)))
+    for apt in appointments:
+        rollup.add("appointments", apt)
+    for invoice in invoices:
+        rollup.add("invoices", invoice)
+    return rollup.records()
 
 
-def generate_inventory():
+def generate_inventory(rng=random, as_of=None):
     """Generate inventory/supplies data"""
     inventory = [
         {"item_id": "INV001", "item_name": "Foundation - Light", "category": "Base", "quantity": 12, "unit": "bottle", "cost_per_unit": 35.00, "reorder_level": 5, "supplier": "MAC Cosmetics"},
@@ -298,26 +535,29 @@ def generate_inventory():
         {"item_id": "INV023", "item_name": "Sanitizing Spray", "category": "Supplies", "quantity": 12, "unit": "bottle", "cost_per_unit": 8.50, "reorder_level": 5, "supplier": "Cinema Secrets"},
     ]
     
+    now = as_of or datetime.now()
     for item in inventory:
         item["total_value"] = round(item["quantity"] * item["cost_per_unit"], 2)
         item["needs_reorder"] = item["quantity"] <= item["reorder_level"]
-        item["last_restocked"] = (datetime.now() - timedelta(days=random.randint(5, 60))).strftime("%Y-%m-%d")
+        item["last_restocked"] = (now - timedelta(days=rng.randint(5, 60))).strftime("%Y-%m-%d")
     
     return inventory
 
 
-def generate_schedule():
-    """Generate schedule/availability data"""
+def generate_schedule(rng=random, as_of=None, booked=None, artists=1, seed=0):
+    """Generate schedule/availability data from the bookings per date (see ScheduleBuilder)"""
     schedule = []
-    base_date = datetime.now()
+    base_date = as_of or datetime.now()
+    booked = booked or {}
     
     # Generate schedule for next 30 days
     for i in range(30):
         date = base_date + timedelta(days=i)
         day_name = date.strftime("%A")
+        hours = business_hours(date, seed)
         
         # Skip some days (closed)
-        if day_name == "Sunday" or (day_name == "Monday" and random.random() < 0.3):
+        if hours is None:
             schedule.append({
                 "date": date.strftime("%Y-%m-%d"),
                 "day_of_week": day_name,
@@ -332,22 +572,22 @@ def generate_schedule():
             })
         else:
             # Regular business hours
-            open_time = "09:00" if day_name == "Saturday" else "10:00"
-            close_time = "18:00"
-            total_slots = 8
-            booked = random.randint(2, 7)
+            opens, closes = hours
+            total_slots = day_capacity(opens, closes) * artists
+            booked_slots = booked.get(date.strftime("%Y-%m-%d"), 0)
             
             schedule.append({
                 "date": date.strftime("%Y-%m-%d"),
                 "day_of_week": day_name,
                 "is_available": True,
-                "open_time": open_time,
-                "close_time": close_time,
+                "open_time": clock_time(opens),
+                "close_time": clock_time(closes),
                 "total_slots": total_slots,
-                "booked_slots": booked,
-                "available_slots": total_slots - booked,
-                "staff_assigned": "Beauty Bee",
-                "notes": "Special event" if random.random() < 0.1 else ""
+                "booked_slots": booked_slots,
+                "available_slots": total_slots - booked_slots,
+                "staff_assigned": "Beauty Bee" if artists == 1 else
+                                  f"Beauty Bee + {artists - 1} artist{'s' if artists > 2 else ''}",
+                "notes": "Special event" if rng.random() < 0.1 else ""
             })
     
     return schedule
@@ -376,149 +616,3151 @@ def generate_settings():
     return settings
 
 
-def create_excel_file(filename="master.xlsx"):
-    """Create Excel file with all data"""
-    if not EXCEL_AVAILABLE:
-        print("Creating JSON files instead...")
-        return create_json_files()
-    
-    print("Generating dummy data...")
-    customers = generate_customers(50)
-    addresses = generate_addresses(customers)
-    appointments = generate_appointments(customers, 100)
-    products = generate_products()
-    invoices = generate_invoices(appointments)
-    staff = generate_staff()
-    analytics = generate_analytics()
-    inventory = generate_inventory()
-    schedule = generate_schedule()
-    settings = generate_settings()
-    
-    print(f"Creating Excel workbook: {filename}")
-    wb = Workbook()
-    
-    # Remove default sheet
-    wb.remove(wb.active)
+# --- Availability engine --------------------------------------------------------
+# Appointments are booked into free slots of the artists' calendars: inside business hours,
+# on the time_slot_duration grid, buffer_time_minutes apart and at most max_daily_bookings
+# per artist per day. Each appointment shard books its own artists, so shards never
+# conflict; when one artist can't take a shard's bookings at a realistic fill, the shard
+# gets more artists (see artist_count). The schedule is derived from the booked appointments.
+
+# Appointments are up to 120 days from 90 days before as-of; offset 89 is yesterday
+APPOINTMENT_DAYS = 121
+YESTERDAY_OFFSET = 89
+# Average bookings per artist per open day that the number of artists is sized for
+ARTIST_DAILY_BOOKINGS = 3
+# Random (artist, day) picks tried before falling back to scanning every calendar
+PLACEMENT_ATTEMPTS = 20
+
+
+def business_setting(key):
+    """Integer value of one of the generate_settings() entries"""
+    for setting in generate_settings():
+        if setting["setting_key"] == key:
+            return int(setting["setting_value"])
+    raise KeyError(key)
+
+
+def business_hours(day, seed=0):
+    """Opening and closing minute of a day, or None when the studio is closed.
     
-    # Define header style
-    header_fill = PatternFill(start_color="D63384", end_color="D63384", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-    header_alignment = Alignment(horizontal="center", vertical="center")
+    Closed on Sundays and ~30% of Mondays; the Mondays come from the seed so that every
+    shard and the schedule agree on them.
+    """
+    weekday = day.weekday()
+    if weekday == 6 or (weekday == 0 and stream_seed(seed, "closed_mondays", day.toordinal()) % 10 < 3):
+        return None
+    return (9 * 60 if weekday == 5 else 10 * 60), 18 * 60
+
+
+def open_days(seed, as_of):
+    """(offset, opening minute, closing minute) for every open day of the appointment window"""
+    start = as_of - timedelta(days=90)
+    days = []
+    for offset in range(APPOINTMENT_DAYS):
+        hours = business_hours(start + timedelta(days=offset), seed)
+        if hours:
+            days.append((offset, *hours))
+    return days
+
+
+def artist_count(appointment_count, days):
+    """Artists needed to hold appointment_count bookings over the open days"""
+    return max(1, -(-appointment_count // (len(days) * ARTIST_DAILY_BOOKINGS)))
+
+
+def day_capacity(opens, closes):
+    """Most bookings one artist can take in a day's hours, as the calendar books them.
     
-    # Create sheets
-    sheets_data = [
-        ("Customers", customers),
-        ("Addresses", addresses),
-        ("Appointments", appointments),
-        ("Products", products),
-        ("Invoices", invoices),
-        ("Staff", staff),
-        ("Analytics", analytics),
-        ("Inventory", inventory),
-        ("Schedule", schedule),
-        ("Settings", settings)
-    ]
+    That is the shortest service back to back: each on the time_slot_duration grid and
+    buffer_time_minutes after the last, up to max_daily_bookings.
+    """
+    slot = business_setting("time_slot_duration")
+    buffer = business_setting("buffer_time_minutes")
+    duration = min(service["duration"] for service in SERVICES)
+    count, start = 0, opens
+    while start + duration <= closes and count < business_setting("max_daily_bookings"):
+        count += 1
+        # The first grid slot a buffer after this booking ends
+        start = opens + -(-(start + duration + buffer - opens) // slot) * slot
+    return count
+
+
+def artist_id(lane):
+    """Staff id of the nth artist: Beauty Bee (STAFF001) first, then STAFF003 on (STAFF002 doesn't do makeup)"""
+    return "STAFF001" if lane == 1 else sys.intern(f"STAFF{lane + 1:03d}")
+
+
+class DayBook:
+    """One artist's bookings on one day, as sorted start/end minutes for bisect conflict checks"""
+    __slots__ = ("starts", "ends")
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+
+    def __len__(self):
+        return len(self.starts)
+
+    def is_free(self, start, end, buffer):
+        """True if start-end overlaps no booking, with buffer minutes kept on either side"""
+        idx = bisect_right(self.starts, start)
+        if idx and self.ends[idx - 1] + buffer > start:
+            return False
+        return idx == len(self.starts) or end + buffer <= self.starts[idx]
+
+    def book(self, start, end):
+        idx = bisect_right(self.starts, start)
+        self.starts.insert(idx, start)
+        self.ends.insert(idx, end)
+
+
+class AvailabilityCalendar:
+    """Book appointments into genuinely free slots across a range of artists' calendars"""
+
+    def __init__(self, seed=0, as_of=None, lanes=1, first_lane=1, rng=random):
+        self.rng = rng
+        self.days = open_days(seed, resolve_as_of(as_of))
+        self.buffer = business_setting("buffer_time_minutes")
+        self.max_daily = business_setting("max_daily_bookings")
+        self.slot = business_setting("time_slot_duration")
+        # (artist, day) pairs with bookings to spare, in a list for O(1) random picks
+        self.open = [(lane, day) for lane in range(first_lane, first_lane + lanes) for day in range(len(self.days))]
+        self.books = {}
+        self.lanes = range(first_lane, first_lane + lanes)
+        window_start = resolve_as_of(as_of) - timedelta(days=90)
+        self.day_index = {(window_start + timedelta(days=offset)).strftime("%Y-%m-%d"): day
+                          for day, (offset, *_) in enumerate(self.days)}
+
+    @classmethod
+    def for_count(cls, appointment_count, seed=0, as_of=None, rng=random):
+        """A calendar with enough artists for appointment_count bookings"""
+        lanes = artist_count(appointment_count, open_days(seed, resolve_as_of(as_of)))
+        return cls(seed, as_of, lanes, rng=rng)
+
+    def place(self, duration):
+        """Book a free slot of duration minutes; returns (day offset, start minute, artist lane)"""
+        for _ in range(PLACEMENT_ATTEMPTS):
+            if not self.open:
+                break
+            placed = self._try(self.rng.randrange(len(self.open)), duration)
+            if placed:
+                return placed
+        # Nearly full: look at every calendar with room before giving up
+        for pick in range(len(self.open)):
+            placed = self._try(pick, duration)
+            if placed:
+                return placed
+        raise RuntimeError(f"No free {duration}-minute slot left for any artist")
+
+    def reserve(self, lane, date, start, duration):
+        """Mark an existing booking as taken; bookings on other days or artists are ignored"""
+        day = self.day_index.get(date)
+        if day is None or lane not in self.lanes:
+            return
+        book = self.books.get((lane, day))
+        if book is None:
+            book = self.books[lane, day] = DayBook()
+        book.book(start, start + duration)
+        if len(book) == self.max_daily:
+            self.open.remove((lane, day))
+
+    def _try(self, pick, duration):
+        """Book the first free slot (from a random one on) on the picked artist's day, if any"""
+        lane, day = self.open[pick]
+        offset, opens, closes = self.days[day]
+        starts = range(opens, closes - duration + 1, self.slot)
+        if not starts:
+            return None
+        book = self.books.get((lane, day))
+        if book is None:
+            book = self.books[lane, day] = DayBook()
+        first = self.rng.randrange(len(starts))
+        for idx in range(len(starts)):
+            start = starts[(first + idx) % len(starts)]
+            if book.is_free(start, start + duration, self.buffer):
+                book.book(start, start + duration)
+                if len(book) >= self.max_daily:
+                    self.open[pick] = self.open[-1]
+                    self.open.pop()
+                return offset, start, lane
+        return None
+
+
+def appointment_shards(config, shard_size=SHARD_SIZE):
+    """(shard, first id, count, first artist, artists) for each appointment shard"""
+    days = open_days(config.seed, config.as_of)
+    shards = []
+    first_lane = 1
+    count = config.appointment_count
+    for shard, start in enumerate(range(1, count + 1, shard_size)):
+        size = min(shard_size, count - start + 1)
+        lanes = artist_count(size, days)
+        shards.append((shard, start, size, first_lane, lanes))
+        first_lane += lanes
+    return shards
+
+
+def total_artists(config):
+    """Number of artists the run's appointments are booked with"""
+    return sum(lanes for *_, lanes in appointment_shards(config)) or 1
+
+
+class ScheduleBuilder:
+    """Derive the schedule's booked and available slots from the appointments as they are merged"""
+
+    def __init__(self, config, artists=None):
+        self.config = config
+        self.booked = {}
+        self.artists = artists
+
+    def add(self, table, appointment):
+        date = appointment["appointment_date"]
+        self.booked[date] = self.booked.get(date, 0) + 1
+
+    def records(self):
+        config = self.config
+        return generate_schedule(table_rng(config.seed, "schedule"), config.as_of, self.booked,
+                                 self.artists or total_artists(config), config.seed)
+
+
+# --- Analytics rollup -----------------------------------------------------------
+# Analytics are aggregated from the appointments and invoices in the same pass that writes
+# them, grouped by date. Each record only touches the totals of its own day (and, when it
+# is a customer's new first visit, the day that used to be), so feeding in more records
+# later only recomputes the days they changed: an append reloads the totals from the rows
+# it reads anyway, then AnalyticsRollup.update() recomputes just the days it touched.
+
+class DayRollup:
+    """Running totals for one day"""
+    __slots__ = ("bookings", "completed", "cancelled", "deposits", "invoices", "revenue", "new_clients",
+                 "first_visit_bookings")
+
+    def __init__(self):
+        self.bookings = self.completed = self.cancelled = 0
+        self.invoices = self.new_clients = self.first_visit_bookings = 0
+        self.deposits = self.revenue = 0.0
+
+
+class AnalyticsRollup:
+    """Aggregate appointments and invoices into per-day analytics in a single streaming pass.
     
-    for sheet_name, data in sheets_data:
-        print(f"Creating sheet: {sheet_name}")
-        ws = wb.create_sheet(sheet_name)
-        
-        if not data:
-            continue
-        
-        # Write headers
-        headers = list(data[0].keys())
-        for col_idx, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col_idx, value=header.replace("_", " ").title())
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = header_alignment
+    A client is new on the date of their first appointment and returning on every later one.
+    The facts have no no-show status or tips, so those columns are always 0.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.days = {}
+        # customer_id -> [date of first appointment, bookings on that date]
+        self.first_visits = {}
+        self.dirty = set()
+
+    def _day(self, date):
+        day = self.days.get(date)
+        if day is None:
+            day = self.days[date] = DayRollup()
+        return day
+
+    def add(self, table, record):
+        """Fold one appointment or invoice into its day's totals"""
+        if table == "invoices":
+            date = record["invoice_date"]
+            day = self._day(date)
+            day.invoices += 1
+            day.revenue += record["total_amount"]
+            self.dirty.add(date)
+            return
         
-        # Write data
-        for row_idx, record in enumerate(data, 2):
-            for col_idx, header in enumerate(headers, 1):
-                ws.cell(row=row_idx, column=col_idx, value=record[header])
+        date = record["appointment_date"]
+        day = self._day(date)
+        day.bookings += 1
+        day.deposits += record["deposit_paid"]
+        if record["status"] == "completed":
+            day.completed += 1
+        elif record["status"] == "cancelled":
+            day.cancelled += 1
+        self.dirty.add(date)
         
-        # Auto-adjust column widths
-        for col_idx, header in enumerate(headers, 1):
-            column_letter = get_column_letter(col_idx)
-            max_length = len(header)
-            for row in ws.iter_rows(min_row=2, max_row=len(data) + 1, min_col=col_idx, max_col=col_idx):
-                for cell in row:
-                    try:
-                        if cell.value:
-                            max_length = max(max_length, len(str(cell.value)))
-                    except:
-                        pass
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
+        first = self.first_visits.get(record["customer_id"])
+        if first is None or date < first[0]:
+            if first is not None:
+                # An earlier visit turned up, so the old first-visit day loses its new client
+                previous = self.days[first[0]]
+                previous.new_clients -= 1
+                previous.first_visit_bookings -= first[1]
+                self.dirty.add(first[0])
+            self.first_visits[record["customer_id"]] = [date, 1]
+            day.new_clients += 1
+            day.first_visit_bookings += 1
+        elif date == first[0]:
+            first[1] += 1
+            day.first_visit_bookings += 1
+
+    def row(self, date):
+        """The analytics record for one date"""
+        day = self.days.get(date) or DayRollup()
+        return {
+            "date": date,
+            "total_bookings": day.bookings,
+            "completed_bookings": day.completed,
+            "cancelled_bookings": day.cancelled,
+            "no_shows": 0,
+            "total_revenue": round(day.revenue, 2),
+            "new_clients": day.new_clients,
+            "returning_clients": day.bookings - day.first_visit_bookings,
+            "average_service_value": round(day.revenue / day.invoices, 2) if day.invoices else 0,
+            "deposit_collected": round(day.deposits, 2),
+            "tips_received": 0
+        }
+
+    def dates(self):
+        """The 90 days before the as-of date that the analytics table covers"""
+        base_date = self.config.as_of - timedelta(days=90)
+        return [(base_date + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(90)]
+
+    def records(self):
+        """Every day of the analytics table"""
+        self.dirty.clear()
+        return [self.row(date) for date in self.dates()]
+
+    def changed(self):
+        """Records for just the days changed since the last records(), changed() or mark_written() call"""
+        window = set(self.dates())
+        rows = [self.row(date) for date in sorted(self.dirty & window)]
+        self.dirty.clear()
+        return rows
+
+    def mark_written(self):
+        """Take the totals so far as already written out, so changed() only returns later changes"""
+        self.dirty.clear()
+
+    def update(self, rows):
+        """An existing analytics table's rows with the days changed since mark_written() recomputed.
         
-        # Freeze header row
-        ws.freeze_panes = "A2"
+        Returns (records, changed dates); if rows don't cover this rollup's 90 days (a different
+        as-of date) every day is recomputed and the changed dates are None.
+        """
+        if [row["date"] for row in rows] != self.dates():
+            return self.records(), None
+        changed = {row["date"]: row for row in self.changed()}
+        return [changed.get(row["date"], row) for row in rows], set(changed)
+
+
+# --- Columnar backend -------------------------------------------------------
+# Draws whole columns at once with NumPy instead of one random call per field per row.
+# Tables stay as column arrays (which also pickle cheaply between pool workers) and are
+# only turned into dict records as they are handed to a writer. The iter_* generators
+# above remain the reference implementation; check_backends() compares the two.
+
+BACKENDS = ["python", "numpy"]
+
+
+def _numpy():
+    """Import NumPy on first use; only the columnar backend needs it"""
+    try:
+        import numpy
+    except ImportError:
+        raise SystemExit("NumPy not installed. Install with: pip install numpy")
+    return numpy
+
+
+def numpy_rng(seed, table, shard=0):
+    """NumPy counterpart of table_rng()"""
+    return _numpy().random.default_rng(stream_seed(seed, table, shard))
+
+
+class ColumnTable:
+    """A table held as NumPy column arrays, iterated as dict records only at the writer boundary"""
+
+    def __init__(self, to_records, columns, **context):
+        self.to_records = to_records
+        self.columns = columns
+        self.context = context
+
+    def __len__(self):
+        return len(next(iter(self.columns.values())))
+
+    def __iter__(self):
+        return self.to_records(*(column.tolist() for column in self.columns.values()), **self.context)
+
+
+def _date_strings(start, days):
+    """Lookup table of YYYY-MM-DD strings for start + 0..days-1 days"""
+    return [(start + timedelta(days=offset)).strftime("%Y-%m-%d") for offset in range(days)]
+
+
+def _customer_records(numbers, first_names, last_names, prefixes, lines, days_ago, visits, points,
+                      contacts, notes, as_of):
+    registered = _date_strings(as_of - timedelta(days=365), 366)[::-1]  # indexed by days ago
+    for number, first, last, prefix, line, ago, total_visits, loyalty, contact, note in zip(
+            numbers, first_names, last_names, prefixes, lines, days_ago, visits, points, contacts, notes):
+        first_name = FIRST_NAMES[first]
+        last_name = LAST_NAMES[last]
+        yield Customer(
+            customer_id=customer_id(number),
+            first_name=first_name,
+            last_name=last_name,
+            email=f"{first_name.lower()}.{last_name.lower()}{number}@email.com",
+            phone=f"(214) {prefix}-{line}",
+            date_registered=registered[ago],
+            total_visits=total_visits,
+            loyalty_points=loyalty,
+            preferred_contact=CONTACT_METHODS[contact],
+            notes=CUSTOMER_NOTES[note]
+        )
+
+
+def customer_columns(count, rng, start=1, as_of=None):
+    """Columnar customers: same fields and distributions as iter_customers"""
+    np = _numpy()
+    return ColumnTable(_customer_records, {
+        "number": np.arange(start, start + count),
+        "first_name": rng.integers(0, len(FIRST_NAMES), count),
+        "last_name": rng.integers(0, len(LAST_NAMES), count),
+        "phone_prefix": rng.integers(100, 1000, count),
+        "phone_line": rng.integers(1000, 10000, count),
+        "days_ago": rng.integers(1, 366, count),
+        "total_visits": rng.integers(1, 16, count),
+        "loyalty_points": rng.integers(0, 501, count),
+        "preferred_contact": rng.integers(0, len(CONTACT_METHODS), count),
+        "notes": rng.integers(0, len(CUSTOMER_NOTES), count),
+    }, as_of=as_of or datetime.now())
+
+
+def _address_records(numbers, billing, street_numbers, streets, apt_kinds, apt_numbers, suite_numbers,
+                     cities, zip_digits, zip_tails):
+    for idx, (number, is_billing, street_number, street, apt_kind, apt_number, suite_number, city,
+              zip_digit, zip_tail) in enumerate(zip(numbers, billing, street_numbers, streets, apt_kinds,
+                                                    apt_numbers, suite_numbers, cities, zip_digits, zip_tails), 1):
+        if is_billing:
+            apt_unit = ""
+        else:
+            apt_unit = sys.intern(("", f"Apt {apt_number}", f"Suite {suite_number}")[apt_kind])
+        yield Address(
+            address_id=f"ADDR{idx:04d}",
+            customer_id=customer_id(number),
+            address_type="billing" if is_billing else "home",
+            street_address=f"{street_number} {STREETS[street]}",
+            apt_unit=apt_unit,
+            city=CITIES[city],
+            state="TX",
+            zip_code=sys.intern(f"75{zip_digit}{zip_tail}"),
+            is_default=not is_billing
+        )
+
+
+def address_columns(customers, rng):
+    """Columnar addresses: a home address per customer, plus a billing one for ~20%"""
+    np = _numpy()
+    numbers = customers.columns["number"]
+    has_billing = rng.random(len(numbers)) < 0.2
+    rows_per_customer = 1 + has_billing
+    count = int(rows_per_customer.sum())
+    # Each customer's rows are contiguous: home first, then billing
+    billing = np.zeros(count, dtype=bool)
+    billing[(np.cumsum(rows_per_customer) - 1)[has_billing]] = True
+    return ColumnTable(_address_records, {
+        "number": np.repeat(numbers, rows_per_customer),
+        "billing": billing,
+        "street_number": rng.integers(100, 10000, count),
+        "street": rng.integers(0, len(STREETS), count),
+        "apt_kind": rng.integers(0, 3, count),
+        "apt_number": rng.integers(1, 1000, count),
+        "suite_number": rng.integers(100, 501, count),
+        "city": rng.integers(0, len(CITIES), count),
+        "zip_digit": rng.integers(0, 10, count),
+        "zip_tail": rng.integers(10, 100, count),
+    })
+
+
+def _appointment_records(numbers, customers, services, offsets, starts, lanes, studio, statuses, methods, notes,
+                         as_of):
+    dates = _date_strings(as_of - timedelta(days=90), APPOINTMENT_DAYS)
+    for number, customer, service_idx, offset, start, lane, at_studio, status_idx, method, note in zip(
+            numbers, customers, services, offsets, starts, lanes, studio, statuses, methods, notes):
+        service = SERVICES[service_idx]
+        status = STATUSES[status_idx]
+        yield Appointment(
+            appointment_id=f"APT{number:04d}",
+            customer_id=customer_id(customer),
+            staff_id=artist_id(lane),
+            service_name=service["name"],
+            appointment_date=dates[offset],
+            appointment_time=clock_time(start),
+            duration_minutes=service["duration"],
+            location="studio" if at_studio else "home",
+            status=status,
+            deposit_paid=service["price"] * 0.30,
+            total_amount=service["price"],
+            balance_due=service["price"] * 0.70 if status != "completed" else 0,
+            payment_method=PAYMENT_METHODS[method] if status == "completed" else "",
+            notes=APPOINTMENT_NOTES[note]
+        )
+
+
+def appointment_columns(customer_count, count, rng, start=1, as_of=None, calendar=None):
+    """Columnar appointments: same fields and distributions as iter_appointments.
     
-    # Save workbook
-    wb.save(filename)
-    print(f"\n✅ Excel file created successfully: {filename}")
-    print(f"\nData Summary:")
-    print(f"  • Customers: {len(customers)}")
-    print(f"  • Addresses: {len(addresses)}")
-    print(f"  • Appointments: {len(appointments)}")
-    print(f"  • Products/Services: {len(products)}")
-    print(f"  • Invoices: {len(invoices)}")
-    print(f"  • Staff: {len(staff)}")
-    print(f"  • Analytics: {len(analytics)}")
-    print(f"  • Inventory: {len(inventory)}")
-    print(f"  • Schedule: {len(schedule)}")
-    print(f"  • Settings: {len(settings)}")
-
-
-def create_json_files():
-    """Create JSON files as fallback"""
-    print("Generating dummy data...")
-    customers = generate_customers(50)
-    addresses = generate_addresses(customers)
-    appointments = generate_appointments(customers, 100)
-    products = generate_products()
-    invoices = generate_invoices(appointments)
-    staff = generate_staff()
-    analytics = generate_analytics()
-    inventory = generate_inventory()
-    schedule = generate_schedule()
-    settings = generate_settings()
-    
-    data = {
+    Slots are booked one at a time through the calendar; everything else is drawn in bulk.
+    """
+    np = _numpy()
+    as_of = as_of or datetime.now()
+    if calendar is None:
+        # Slots are placed by a Python RNG; seed it from the numpy one so the call stays reproducible
+        calendar = AvailabilityCalendar.for_count(count, as_of=as_of,
+                                                  rng=random.Random(int(rng.integers(0, 2 ** 63))))
+    services = rng.integers(0, len(SERVICES), count)
+    placements = np.array([calendar.place(SERVICES[service]["duration"]) for service in services.tolist()],
+                          dtype=np.int64).reshape(count, 3)
+    offsets = placements[:, 0]
+    draw = rng.random(count)
+    completed, cancelled = STATUSES.index("completed"), STATUSES.index("cancelled")
+    confirmed, pending = STATUSES.index("confirmed"), STATUSES.index("pending")
+    statuses = np.where(
+        offsets < YESTERDAY_OFFSET, np.where(draw < 0.75, completed, cancelled),
+        np.where(offsets == YESTERDAY_OFFSET, completed, np.where(draw < 2 / 3, confirmed, pending)))
+    return ColumnTable(_appointment_records, {
+        "number": np.arange(start, start + count),
+        "customer": rng.integers(1, customer_count + 1, count),
+        "service": services,
+        "offset": offsets,
+        "start": placements[:, 1],
+        "staff": placements[:, 2],
+        "studio": rng.random(count) < 0.75,
+        "status": statuses,
+        "payment_method": rng.integers(0, len(PAYMENT_METHODS), count),
+        "notes": rng.integers(0, len(APPOINTMENT_NOTES), count),
+    }, as_of=as_of)
+
+
+def _invoice_records(numbers, customers, services, offsets, methods, discounts, as_of):
+    dates = _date_strings(as_of - timedelta(days=90), APPOINTMENT_DAYS + 15)
+    for idx, (number, customer, service_idx, offset, method, discount) in enumerate(
+            zip(numbers, customers, services, offsets, methods, discounts), 1):
+        total = SERVICES[service_idx]["price"]
+        tax = round(total * 0.0825, 2)
+        discount = INVOICE_DISCOUNTS[discount]
+        yield Invoice(
+            invoice_id=f"INV{idx:05d}",
+            appointment_id=f"APT{number:04d}",
+            customer_id=customer_id(customer),
+            invoice_date=dates[offset],
+            due_date=dates[offset + 15],
+            subtotal=total,
+            tax_rate=8.25,
+            tax_amount=tax,
+            discount=discount,
+            total_amount=round(total + tax - discount, 2),
+            amount_paid=round(total + tax - discount, 2),
+            balance=0,
+            payment_status="paid",
+            payment_date=dates[offset],
+            payment_method=PAYMENT_METHODS[method]
+        )
+
+
+def invoice_columns(appointments, rng):
+    """Columnar invoices for the completed appointments of an appointment ColumnTable"""
+    columns = appointments.columns
+    completed = columns["status"] == STATUSES.index("completed")
+    return ColumnTable(_invoice_records, {
+        "number": columns["number"][completed],
+        "customer": columns["customer"][completed],
+        "service": columns["service"][completed],
+        "offset": columns["offset"][completed],
+        "payment_method": columns["payment_method"][completed],
+        "discount": rng.integers(0, len(INVOICE_DISCOUNTS), int(completed.sum())),
+    }, **appointments.context)
+
+
+def _column_profile(records, fields):
+    """Share of each value per categorical field, for comparing backends"""
+    counts = {field: {} for field in fields}
+    total = 0
+    for record in records:
+        total += 1
+        for field in fields:
+            value = record[field]
+            counts[field][value] = counts[field].get(value, 0) + 1
+    return {field: {value: n / total for value, n in values.items()} for field, values in counts.items()}, total
+
+
+# Fields compared by check_backends(); numeric ones are bucketed by their categorical source where needed
+BACKEND_CHECK_FIELDS = {
+    "customers": ["first_name", "last_name", "total_visits", "preferred_contact", "notes"],
+    "addresses": ["address_type", "city", "apt_unit", "zip_code"],
+    "appointments": ["service_name", "appointment_date", "appointment_time", "location", "status",
+                     "staff_id", "balance_due", "payment_method", "notes"],
+    "invoices": ["invoice_date", "discount", "total_amount", "payment_method"],
+}
+
+
+def check_backends(count=20000, seed=0, as_of=None, tolerance=0.02):
+    """Generate the big tables with both backends and compare their column distributions.
+    
+    Every categorical value's share must agree within tolerance, and row counts within 2%.
+    Prints a line per table and returns True if everything matched.
+    """
+    as_of = resolve_as_of(as_of)
+    python_tables = {
+        "customers": list(iter_customers(count, table_rng(seed, "customers"), 1, as_of)),
+        "appointments": list(iter_appointments(IdSequence(count), count, table_rng(seed, "appointments"), 1, as_of,
+                                               AvailabilityCalendar.for_count(count, seed, as_of,
+                                                                              table_rng(seed, "calendar")))),
+    }
+    python_tables["addresses"] = list(iter_addresses(python_tables["customers"], table_rng(seed, "addresses")))
+    python_tables["invoices"] = list(iter_invoices(python_tables["appointments"], table_rng(seed, "invoices")))
+    
+    customers = customer_columns(count, numpy_rng(seed, "customers"), 1, as_of)
+    appointments = appointment_columns(count, count, numpy_rng(seed, "appointments"), 1, as_of,
+                                       AvailabilityCalendar.for_count(count, seed, as_of, table_rng(seed, "calendar")))
+    numpy_tables = {
         "customers": customers,
-        "addresses": addresses,
+        "addresses": address_columns(customers, numpy_rng(seed, "addresses")),
         "appointments": appointments,
-        "products": products,
-        "invoices": invoices,
-        "staff": staff,
-        "analytics": analytics,
-        "inventory": inventory,
-        "schedule": schedule,
-        "settings": settings
+        "invoices": invoice_columns(appointments, numpy_rng(seed, "invoices")),
     }
     
-    # Save individual JSON files
-    for key, value in data.items():
-        filename = f"../json/{key}.json"
-        with open(filename, 'w') as f:
-            json.dump({key: value}, f, indent=2)
-        print(f"✅ Created: {filename}")
-    
-    # Save master JSON file
-    with open("../json/master_data.json", 'w') as f:
-        json.dump(data, f, indent=2)
-    print(f"✅ Created: ../json/master_data.json")
-    
-    print(f"\nData Summary:")
-    print(f"  • Customers: {len(customers)}")
-    print(f"  • Addresses: {len(addresses)}")
-    print(f"  • Appointments: {len(appointments)}")
-    print(f"  • Products/Services: {len(products)}")
-    print(f"  • Invoices: {len(invoices)}")
-    print(f"  • Staff: {len(staff)}")
+    all_ok = True
+    for table, fields in BACKEND_CHECK_FIELDS.items():
+        expected, expected_rows = _column_profile(python_tables[table], fields)
+        actual, actual_rows = _column_profile(numpy_tables[table], fields)
+        worst_field, worst = None, 0.0
+        for field in fields:
+            for value in set(expected[field]) | set(actual[field]):
+                gap = abs(expected[field].get(value, 0) - actual[field].get(value, 0))
+                if gap > worst:
+                    worst_field, worst = f"{field}={value!r}", gap
+        rows_ok = abs(actual_rows - expected_rows) <= 0.02 * expected_rows
+        ok = rows_ok and worst <= tolerance
+        all_ok = all_ok and ok
+        print(f"{'✅' if ok else '❌'} {table}: {expected_rows} vs {actual_rows} rows, "
+              f"largest share difference {worst:.4f} ({worst_field})")
+    return all_ok
+
+
+# --- Instrumentation ------------------------------------------------------------
+# A RunReport records wall time, rows and peak memory per stage: each table's generators
+# (timed inside the shard tasks, so with --workers their seconds are summed across
+# processes), the sinks its records are written to, the derived-table builders, and the
+# steps that run once (saving the workbook, the indexes, master_data.json). The command
+# line activates one per run and saves it as REPORT_FILE next to the outputs; with none
+# active the hooks do nothing. Peak memory is this process's RSS high-water mark over the
+# stage where Linux lets it be reset, and the run's so far elsewhere; pool workers aren't
+# included. Under --profile memory, tracemalloc's peak is recorded per stage as well.
+
+REPORT_FILE = "generate_report.json"
+PROFILE_MODES = ["cpu", "memory"]
+PROFILE_FILES = {"cpu": "generate_profile.prof", "memory": "generate_tracemalloc.txt"}
+PROGRESS_INTERVAL = 0.5  # seconds between redraws of the progress line
+
+_active_report = None
+
+
+def active_report():
+    """The RunReport the current run records into, or None"""
+    return _active_report
+
+
+def report_stage(stage, table=None, rows=0):
+    """Time a step of the run into the active report, if there is one"""
+    return _active_report.stage(stage, table, rows) if _active_report else nullcontext({})
+
+
+def report_sinks(sinks, stage="write"):
+    """Time the records written to sinks into the active report, if there is one"""
+    if not _active_report:
+        return sinks
+    return {table: _active_report.timed_sink(stage, table, sink) for table, sink in sinks.items()}
+
+
+def peak_rss_mb():
+    """This process's peak resident memory in MB, since the last reset_peak_rss where supported"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def reset_peak_rss():
+    """Restart the RSS high-water mark so the next reading covers only what follows (Linux only)"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _stopwatch():
+    """A function returning the seconds since it was created or last called"""
+    last = time.perf_counter()
+
+    def lap():
+        nonlocal last
+        now = time.perf_counter()
+        seconds, last = now - last, now
+        return seconds
+    return lap
+
+
+class RunReport:
+    """Per-stage timings, row counts and peak memory of one run, with an optional live progress line"""
+
+    def __init__(self, progress=False, profile=None):
+        if profile not in (None, *PROFILE_MODES):
+            raise ValueError(f"Unknown profile mode: {profile}")
+        self.progress = progress
+        self.profile = profile
+        self.config = None
+        # Which output the entries being recorded are for, when a run writes several
+        self.output = None
+        self.started = datetime.now()
+        self.seconds = None
+        # (output, stage, table) -> {"seconds", "rows", "peak_rss_mb"[, "traced_peak_mb"]}, in first-use order
+        self.entries = {}
+        self._open = []  # memory peaks of the stages being timed, innermost last
+        self._expected = 0
+        self._generate_start = None
+        self._drawn = 0.0
+        self._profile = None
+
+    def entry(self, stage, table=None):
+        return self.entries.setdefault((self.output, stage, table), {"seconds": 0.0, "rows": 0})
+
+    @contextmanager
+    def stage(self, stage, table=None, rows=0):
+        """Time a step; entries first used inside it (sinks, generators) share its memory peak"""
+        entry = self.entry(stage, table)
+        earlier = [key for key, other in self.entries.items() if other is not entry]
+        self._enter_memory()
+        start = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            entry["seconds"] += time.perf_counter() - start
+            entry["rows"] += rows
+            peaks = self._exit_memory()
+            for key, other in self.entries.items():
+                if key not in earlier:
+                    for field, value in peaks.items():
+                        other[field] = max(other.get(field, 0), value)
+
+    def _readings(self):
+        readings = {"peak_rss_mb": peak_rss_mb()}
+        if tracemalloc.is_tracing():
+            readings["traced_peak_mb"] = tracemalloc.get_traced_memory()[1] / (1 << 20)
+        return {field: value for field, value in readings.items() if value is not None}
+
+    def _enter_memory(self):
+        # Fold the peak so far into the enclosing stages before resetting it for this one
+        if self._open:
+            self._fold(self._readings())
+        reset_peak_rss()
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        self._open.append({})
+
+    def _exit_memory(self):
+        self._fold(self._readings())
+        peaks = self._open.pop()
+        if self._open:
+            self._fold(peaks)
+        return peaks
+
+    def _fold(self, readings):
+        peaks = self._open[-1]
+        for field, value in readings.items():
+            peaks[field] = max(peaks.get(field, 0), value)
+
+    def timed_sink(self, stage, table, sink, count=True):
+        """Wrap sink so the time spent in it (and, if count, the records it gets) go to (stage, table)"""
+        entry = self.entry(stage, table)
+        clock = time.perf_counter
+
+        def timed(record):
+            start = clock()
+            sink(record)
+            entry["seconds"] += clock() - start
+            if count:
+                entry["rows"] += 1
+        return timed
+
+    def sink_seconds(self):
+        """Seconds spent in timed sinks so far, to take out of a merge's time"""
+        return sum(entry["seconds"] for (_, stage, _), entry in self.entries.items() if stage in ("write", "derive"))
+
+    def expect(self, count):
+        """Start the progress line for a generate stage producing count customers and appointments"""
+        self._expected = count
+        self._generate_start = time.perf_counter()
+
+    def generated(self, table, seconds, rows):
+        """Record a shard's worth of one table's generation, and update the progress line"""
+        entry = self.entry("generate", table)
+        entry["seconds"] += seconds
+        entry["rows"] += rows
+        if self.progress:
+            self.draw()
+
+    def draw(self, final=False):
+        """Redraw the progress line on stderr, at most every PROGRESS_INTERVAL seconds"""
+        now = time.perf_counter()
+        if self._generate_start is None or not final and now - self._drawn < PROGRESS_INTERVAL:
+            return
+        self._drawn = now
+        elapsed = now - self._generate_start
+        rows = sum(entry["rows"] for (output, stage, table), entry in self.entries.items()
+                   if output == self.output and stage == "generate" and table)
+        line = f"⏳ {rows:,} rows  {rows / elapsed if elapsed else 0:,.0f} rows/s  {elapsed:.0f}s"
+        if self._expected:
+            done = sum(self.entry("generate", table)["rows"] for table in ("customers", "appointments"))
+            fraction = min(done / self._expected, 1)
+            line += f"  {fraction:.0%}"
+            if 0 < fraction < 1:
+                line += f"  ~{elapsed * (1 - fraction) / fraction:.0f}s left"
+        sys.stderr.write(f"\r{line:<72}" + ("\n" if final else ""))
+        sys.stderr.flush()
+        if final:
+            self._generate_start = None
+
+    @contextmanager
+    def activate(self):
+        """Make this the report the run records into, under the profiler if one was asked for"""
+        global _active_report
+        profiler = None
+        if self.profile == "cpu":
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+        elif self.profile == "memory":
+            tracemalloc.start()
+        _active_report = self
+        lap = _stopwatch()
+        try:
+            with self.stage("run"):
+                yield self
+        finally:
+            _active_report = None
+            self.seconds = lap()
+            if profiler:
+                profiler.disable()
+            self._profile = profiler or (tracemalloc.take_snapshot() if self.profile == "memory" else None)
+            if self.profile == "memory":
+                tracemalloc.stop()
+
+    def stages(self):
+        """The entries as a list of dicts, with rows/sec worked out"""
+        stages = []
+        for (output, stage, table), entry in self.entries.items():
+            seconds = entry["seconds"]
+            stages.append({
+                "output": output,
+                "stage": stage,
+                "table": table,
+                "seconds": round(seconds, 4),
+                "rows": entry["rows"],
+                "rows_per_sec": round(entry["rows"] / seconds) if entry["rows"] and seconds else None,
+                **{field: round(entry[field], 1) for field in ("peak_rss_mb", "traced_peak_mb") if field in entry},
+            })
+        return stages
+
+    def print_summary(self):
+        print(f"\nTimings ({self.seconds:.2f} s):")
+        for stage in self.stages():
+            if stage["stage"] == "run":
+                continue
+            name = f"{stage['output'] + ': ' if stage['output'] else ''}{stage['stage']} {stage['table'] or ''}".strip()
+            rate = f"{stage['rows_per_sec']:>10,} rows/s" if stage["rows_per_sec"] else " " * 17
+            peak = f"{stage['peak_rss_mb']:8.1f} MB" if "peak_rss_mb" in stage else ""
+            if "traced_peak_mb" in stage:
+                peak += f"  {stage['traced_peak_mb']:8.1f} MB traced"
+            print(f"  • {name:<28} {stage['seconds']:9.3f} s  {stage['rows']:>10,} rows  {rate}  {peak}")
+
+    def save(self, directory="."):
+        """Write the report (and the profile, if one was taken) to directory; returns the filenames"""
+        config = None
+        if self.config:
+            config = {**asdict(self.config), "as_of": f"{self.config.as_of:%Y-%m-%d}"}
+        filenames = [os.path.join(directory, REPORT_FILE)]
+        with open(filenames[0], "w") as f:
+            json.dump({
+                "started": self.started.isoformat(timespec="seconds"),
+                "command": sys.argv,
+                "generator_version": GENERATOR_VERSION,
+                "python": sys.version.split()[0],
+                "config": config,
+                "profile": self.profile,
+                "seconds": round(self.seconds, 4),
+                "stages": self.stages(),
+            }, f, indent=2)
+        
+        if self.profile:
+            filenames.append(os.path.join(directory, PROFILE_FILES[self.profile]))
+            if self.profile == "cpu":
+                import pstats
+                self._profile.dump_stats(filenames[-1])
+                pstats.Stats(self._profile).sort_stats("cumulative").print_stats(15)
+            else:
+                top = self._profile.statistics("lineno")
+                with open(filenames[-1], "w") as f:
+                    f.writelines(f"{stat}\n" for stat in top[:50])
+                print("\nLargest allocations still held at the end of the run:")
+                for stat in top[:10]:
+                    print(f"  {stat}")
+        return filenames
+
+
+# Tables generated whole rather than in shards, each called with its own RNG stream and the resolved config
+SMALL_TABLES = {
+    "products": lambda rng, config: generate_products(rng),
+    "staff": lambda rng, config: generate_staff(total_artists(config), rng),
+    "inventory": lambda rng, config: generate_inventory(rng, config.as_of),
+    "settings": lambda rng, config: generate_settings(),
+}
+# Tables computed from other tables' records as those are merged: table -> (sources, builder class).
+# Builders take the config, are fed every source record via add(table, record) and produce records().
+DERIVED_TABLES = {
+    "analytics": (("appointments", "invoices"), AnalyticsRollup),
+    "schedule": (("appointments",), ScheduleBuilder),
+}
+
+
+def _drain(records, sink):
+    """Pass every record to sink"""
+    for record in records:
+        sink(record)
+
+
+def resolve_as_of(as_of=None):
+    """Normalise the as-of date to midnight, defaulting to today"""
+    as_of = as_of or datetime.now()
+    return datetime(as_of.year, as_of.month, as_of.day)
+
+
+@dataclass
+class RunConfig:
+    """What a generator run produces (counts, seed, as-of date, backend, tables) and how (workers)"""
+    customer_count: int = DEFAULT_CUSTOMERS
+    appointment_count: int = DEFAULT_APPOINTMENTS
+    seed: int = None
+    as_of: datetime = None
+    workers: int = 1
+    backend: str = "python"
+    tables: tuple = tuple(TABLE_NAMES)
+
+
+def select_tables(tables=None):
+    """The named tables (default: all of them) in output order"""
+    if tables is None:
+        return tuple(TABLE_NAMES)
+    unknown = set(tables) - set(TABLE_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown tables: {', '.join(sorted(unknown))}")
+    return tuple(table for table in TABLE_NAMES if table in tables)
+
+
+def resolve_run(config, manifest=None):
+    """Fill in the seed (reusing the manifest's, if any) and as-of date, and print them for reproducing the run"""
+    if config.seed is None:
+        config.seed = manifest.seed if manifest and manifest.seed is not None else random.randrange(2 ** 32)
+    config.as_of = resolve_as_of(config.as_of)
+    print(f"Using seed {config.seed}, as of {config.as_of:%Y-%m-%d}")
+    if _active_report:
+        _active_report.config = config
+    return config
+
+
+def stream_seed(seed, table, shard=0):
+    """Derive a reproducible seed for one table (or one shard of a table) from the run seed"""
+    digest = hashlib.sha256(f"{seed}:{table}:{shard}".encode()).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def table_rng(seed, table, shard=0):
+    """Independent random.Random stream for one table (or one shard of a table)"""
+    return random.Random(stream_seed(seed, table, shard))
+
+
+def shard_tasks(config, tables=TABLE_NAMES, shard_size=SHARD_SIZE):
+    """List the generation tasks needed for tables, in output order"""
+    tables = frozenset(tables)
+    tasks = [("table", config, tables, table) for table in SMALL_TABLES if table in tables]
+    if tables & {"customers", "addresses"}:
+        count = config.customer_count
+        for shard, start in enumerate(range(1, count + 1, shard_size)):
+            tasks.append(("customers", config, tables, shard, start, min(shard_size, count - start + 1)))
+    if tables & {"appointments", "invoices"}:
+        for shard, start, count, first_lane, lanes in appointment_shards(config, shard_size):
+            tasks.append(("appointments", config, tables, shard, start, count, first_lane, lanes))
+    return tasks
+
+
+def run_shard_task(task):
+    """Generate one task's records; returns [(table, records, seconds), ...]. Runs inside pool workers.
+    
+    With the numpy backend the big tables come back as ColumnTables rather than lists, and
+    the seconds leave out building their records, which happens as they are merged.
+    """
+    kind, config, tables, *params = task
+    seed, as_of = config.seed, config.as_of
+    lap = _stopwatch()
+    if kind == "table":
+        table, = params
+        return [(table, SMALL_TABLES[table](table_rng(seed, table), config), lap())]
+    
+    shard, start, count, *lanes = params
+    columnar = config.backend == "numpy"
+    if kind == "customers":
+        # Addresses are built from the customer shard, so customers are generated either way
+        if columnar:
+            customers = customer_columns(count, numpy_rng(seed, "customers", shard), start, as_of)
+        else:
+            customers = list(iter_customers(count, table_rng(seed, "customers", shard), start, as_of))
+        results = [("customers", customers, lap())]
+        if "addresses" in tables:
+            if columnar:
+                addresses = address_columns(customers, numpy_rng(seed, "addresses", shard))
+            else:
+                addresses = list(iter_addresses(customers, table_rng(seed, "addresses", shard)))
+            results.append(("addresses", addresses, lap()))
+    else:
+        first_lane, lane_count = lanes
+        calendar = AvailabilityCalendar(seed, as_of, lane_count, first_lane, table_rng(seed, "calendar", shard))
+        if columnar:
+            appointments = appointment_columns(config.customer_count, count,
+                                               numpy_rng(seed, "appointments", shard), start, as_of, calendar)
+        else:
+            appointments = list(iter_appointments(IdSequence(config.customer_count), count,
+                                                  table_rng(seed, "appointments", shard), start, as_of, calendar))
+        results = [("appointments", appointments, lap())]
+        if "invoices" in tables:
+            if columnar:
+                invoices = invoice_columns(appointments, numpy_rng(seed, "invoices", shard))
+            else:
+                invoices = list(iter_invoices(appointments, table_rng(seed, "invoices", shard)))
+            results.append(("invoices", invoices, lap()))
+    return [result for result in results if result[0] in tables]
+
+
+def _ordered_results(pool, func, tasks, window):
+    """Like pool.imap, but with at most window tasks in flight so results can't pile up"""
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.apply_async(func, (task,)))
+        if len(pending) >= window:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+# Shards number their addresses and invoices locally; these are renumbered when merged
+SHARD_RENUMBER = {
+    "addresses": ("address_id", "ADDR{:04d}"),
+    "invoices": ("invoice_id", "INV{:05d}"),
+}
+
+
+def generate_sharded(sinks, config):
+    """Generate tables as independent, seeded shards across a process pool and merge them in order.
+    
+    Customers and appointments are split into SHARD_SIZE ID ranges. Every table and shard has
+    its own RNG stream derived from the seed, so the worker count never changes the output.
+    Derived tables are built from their sources as those are merged, and emitted last.
+    The config must already be resolved (see resolve_run).
+    """
+    report = active_report()
+    if report is None:
+        return _generate_sharded(sinks, config, None)
+    with report.stage("generate") as entry:
+        _generate_sharded(sinks, config, report)
+        entry["rows"] = sum(report.entry("write", table)["rows"] for table in sinks)
+
+
+def _generate_sharded(sinks, config, report):
+    derived = {table: DERIVED_TABLES[table][1](config) for table in sinks if table in DERIVED_TABLES}
+    if report:
+        sources = {source for table in derived for source in DERIVED_TABLES[table][0]}
+        for table in TABLE_NAMES:
+            if (table in sinks or table in sources) and table not in derived:
+                report.entry("generate", table)
+        sinks = {table: report.timed_sink("write", table, sink) for table, sink in sinks.items()}
+        report.expect(config.customer_count * ("customers" in sinks or "addresses" in sinks)
+                      + config.appointment_count * bool({"appointments", "invoices", *derived} & set(sinks)))
+    outputs = {table: [sink] for table, sink in sinks.items() if table not in derived}
+    for table, builder in derived.items():
+        for source in DERIVED_TABLES[table][0]:
+            add = partial(builder.add, source)
+            outputs.setdefault(source, []).append(report.timed_sink("derive", table, add, False) if report else add)
+    tasks = shard_tasks(config, set(outputs))
+    workers = config.workers
+    
+    pool = None
+    if workers > 1:
+        import multiprocessing  # only pool runs pay for importing it
+        pool = multiprocessing.Pool(workers)
+    try:
+        results = _ordered_results(pool, run_shard_task, tasks, workers * 2) if pool else map(run_shard_task, tasks)
+        counters = {table: 0 for table in SHARD_RENUMBER}
+        for shard_records in results:
+            for table, records, seconds in shard_records:
+                if report:
+                    # Whatever the merge spends outside the sinks (numpy records, renumbering) is generation
+                    seconds += report.sink_seconds() - time.perf_counter()
+                sink = _fan_out(outputs[table])
+                if table in SHARD_RENUMBER:
+                    id_key, id_format = SHARD_RENUMBER[table]
+                    for record in records:
+                        counters[table] += 1
+                        record[id_key] = id_format.format(counters[table])
+                        sink(record)
+                else:
+                    _drain(records, sink)
+                if report:
+                    report.generated(table, seconds + time.perf_counter() - report.sink_seconds(), len(records))
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    
+    for table, builder in derived.items():
+        if report:
+            with report.stage("derive", table):
+                records = builder.records()
+                report.entry("derive", table)["rows"] += len(records)
+        else:
+            records = builder.records()
+        _drain(records, sinks[table])
+    if report and report.progress:
+        report.draw(final=True)
+
+
+def _fan_out(sinks):
+    """A single sink passing each record to every sink in the list"""
+    if len(sinks) == 1:
+        return sinks[0]
+    
+    def fan_out(record):
+        for sink in sinks:
+            sink(record)
+    return fan_out
+
+
+# What each table's contents depend on, besides the seed, shard size and generator version
+TABLE_INPUTS = {
+    "customers": ("customer_count", "as_of", "backend", "FIRST_NAMES", "LAST_NAMES", "CONTACT_METHODS",
+                  "CUSTOMER_NOTES"),
+    "addresses": ("customer_count", "backend", "STREETS", "CITIES"),
+    "appointments": ("customer_count", "appointment_count", "as_of", "backend", "SERVICES", "STATUSES",
+                     "PAYMENT_METHODS", "APPOINTMENT_NOTES", "SETTINGS"),
+    "products": ("SERVICES",),
+    "invoices": ("customer_count", "appointment_count", "as_of", "backend", "SERVICES", "STATUSES",
+                 "PAYMENT_METHODS", "APPOINTMENT_NOTES", "INVOICE_DISCOUNTS", "SETTINGS"),
+    "staff": ("appointment_count", "as_of", "FIRST_NAMES", "LAST_NAMES"),
+    "analytics": ("customer_count", "appointment_count", "as_of", "backend", "SERVICES", "STATUSES",
+                  "PAYMENT_METHODS", "APPOINTMENT_NOTES", "INVOICE_DISCOUNTS", "SETTINGS"),
+    "inventory": ("as_of",),
+    "schedule": ("customer_count", "appointment_count", "as_of", "backend", "SERVICES", "STATUSES",
+                 "PAYMENT_METHODS", "APPOINTMENT_NOTES", "SETTINGS"),
+    "settings": (),
+}
+
+
+def table_input_hashes(config):
+    """Hash everything each table is generated from; a changed hash means the table is stale"""
+    values = {
+        "customer_count": config.customer_count,
+        "appointment_count": config.appointment_count,
+        "as_of": config.as_of.strftime("%Y-%m-%d"),
+        "backend": config.backend,
+        "FIRST_NAMES": FIRST_NAMES,
+        "LAST_NAMES": LAST_NAMES,
+        "SERVICES": SERVICES,
+        "STREETS": STREETS,
+        "CITIES": CITIES,
+        "STATUSES": STATUSES,
+        "PAYMENT_METHODS": PAYMENT_METHODS,
+        "CONTACT_METHODS": CONTACT_METHODS,
+        "CUSTOMER_NOTES": CUSTOMER_NOTES,
+        "APPOINTMENT_NOTES": APPOINTMENT_NOTES,
+        "INVOICE_DISCOUNTS": INVOICE_DISCOUNTS,
+        "SETTINGS": generate_settings(),
+    }
+    hashes = {}
+    for table in TABLE_NAMES:
+        inputs = {"table": table, "version": GENERATOR_VERSION, "seed": config.seed, "shard_size": SHARD_SIZE}
+        inputs.update((name, values[name]) for name in TABLE_INPUTS[table])
+        hashes[table] = hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+    return hashes
+
+
+def combined_hash(hashes, tables=TABLE_NAMES):
+    """Single hash for an output built from several tables (master_data.json, master.xlsx)"""
+    return hashlib.sha256("".join(hashes[table] for table in tables).encode()).hexdigest()
+
+
+def file_digest(filename):
+    """sha256 of a file's contents, read in chunks"""
+    sha = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class Manifest:
+    """Which inputs produced each output file, so a rerun only rewrites the stale ones"""
+
+    def __init__(self, filename=None):
+        self.filename = filename or output_filename(MANIFEST_FILE)
+        try:
+            with open(self.filename) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        self.seed = data.get("seed")
+        self.as_of = data.get("as_of")
+        self.files = data.get("files", {})
+
+    def is_fresh(self, output, inputs_hash):
+        """True if output was written from these inputs and hasn't been touched since"""
+        entry = self.files.get(output)
+        if not entry or entry["inputs"] != inputs_hash or not os.path.exists(output):
+            return False
+        stat = os.stat(output)
+        if entry["stat"] == [stat.st_size, stat.st_mtime_ns]:
+            return True
+        # Touched but maybe not changed: fall back to the content hash
+        if file_digest(output) != entry["sha256"]:
+            return False
+        entry["stat"] = [stat.st_size, stat.st_mtime_ns]
+        return True
+
+    def record(self, output, inputs_hash):
+        stat = os.stat(output)
+        self.files[output] = {
+            "inputs": inputs_hash,
+            "sha256": file_digest(output),
+            "stat": [stat.st_size, stat.st_mtime_ns],
+        }
+
+    def save(self, seed, as_of=None):
+        self.seed = seed
+        if as_of is not None:
+            self.as_of = f"{as_of:%Y-%m-%d}"
+        with open(self.filename, "w") as f:
+            json.dump({"seed": seed, "as_of": self.as_of, "files": self.files}, f, indent=2)
+
+
+def create_excel_file(filename="master.xlsx", customer_count=DEFAULT_CUSTOMERS, appointment_count=DEFAULT_APPOINTMENTS,
+                      write_only=False, workers=1, seed=None, as_of=None, force=False, backend="python", tables=None):
+    """Create Excel file with all data (or a sheet for each of tables)"""
+    if not excel_available():
+        print("Creating JSON files instead...")
+        return create_json_files(customer_count, appointment_count, workers=workers, seed=seed, as_of=as_of,
+                                 force=force, backend=backend, tables=tables)
+    
+    manifest = Manifest()
+    config = resolve_run(RunConfig(customer_count, appointment_count, seed, as_of, workers, backend,
+                                   select_tables(tables)), manifest)
+    inputs_hash = combined_hash(table_input_hashes(config), config.tables)
+    if not force and manifest.is_fresh(filename, inputs_hash):
+        print(f"⏭️  Unchanged: {filename}")
+        return
+    
+    if write_only:
+        _stream_excel_file(filename, config)
+    else:
+        _build_excel_file(filename, config)
+    manifest.record(filename, inputs_hash)
+    manifest.save(config.seed, config.as_of)
+
+
+def _build_excel_file(filename, config):
+    """Build master.xlsx in memory with a regular openpyxl workbook"""
+    print("Generating dummy data...")
+    data = {key: [] for key in config.tables}
+    generate_sharded({key: records.append for key, records in data.items()}, config)
+    with report_stage("write", filename, sum(map(len, data.values()))):
+        write_workbook(filename, data)
+
+
+def write_workbook(filename, data):
+    """Write {table: records} to filename with a regular openpyxl workbook, a sheet per table"""
+    print(f"Creating Excel workbook: {filename}")
+    wb = Workbook()
+    
+    # Remove default sheet
+    wb.remove(wb.active)
+    
+    # Define header style
+    header_fill = PatternFill(start_color="D63384", end_color="D63384", fill_type="solid")
+    header_font = Font(bold=True, color="FFFFFF")
+    header_alignment = Alignment(horizontal="center", vertical="center")
+    
+    # Create sheets
+    for key, records in data.items():
+        print(f"Creating sheet: {key.title()}")
+        ws = wb.create_sheet(key.title())
+        
+        if not records:
+            continue
+        
+        # Write headers
+        headers = list(records[0].keys())
+        for col_idx, header in enumerate(headers, 1):
+            cell = ws.cell(row=1, column=col_idx, value=header.replace("_", " ").title())
+            cell.fill = header_fill
+            cell.font = header_font
+            cell.alignment = header_alignment
+        
+        # Write data
+        for row_idx, record in enumerate(records, 2):
+            for col_idx, header in enumerate(headers, 1):
+                ws.cell(row=row_idx, column=col_idx, value=record[header])
+        
+        # Auto-adjust column widths
+        fit_column_widths(ws, headers, len(records))
+        
+        # Freeze header row
+        ws.freeze_panes = "A2"
+    
+    # Save workbook
+    wb.save(filename)
+    print(f"\n✅ Excel file created successfully: {filename}")
+    print(f"\nData Summary:")
+    for key, records in data.items():
+        print(f"  • {key.title()}: {len(records)}")
+
+
+def fit_column_widths(ws, headers, row_count):
+    """Size each column to its longest value (capped at 50) by scanning the sheet's cells"""
+    for col_idx, header in enumerate(headers, 1):
+        column_letter = get_column_letter(col_idx)
+        max_length = len(header)
+        for row in ws.iter_rows(min_row=2, max_row=row_count + 1, min_col=col_idx, max_col=col_idx):
+            for cell in row:
+                try:
+                    if cell.value:
+                        max_length = max(max_length, len(str(cell.value)))
+                except:
+                    pass
+        adjusted_width = min(max_length + 2, 50)
+        ws.column_dimensions[column_letter].width = adjusted_width
+
+
+class SheetSpool:
+    """Collect one sheet's rows in a temp file, measuring column widths as they pass through"""
+
+    def __init__(self):
+        self.headers = None
+        self.widths = None
+        self.count = 0
+        self._file = tempfile.TemporaryFile()
+
+    def add(self, record):
+        if self.headers is None:
+            self.headers = list(record.keys())
+            self.widths = [len(header) for header in self.headers]
+        row = tuple(record[header] for header in self.headers)
+        widths = self.widths
+        for col_idx, value in enumerate(row):
+            if value:
+                length = len(str(value))
+                if length > widths[col_idx]:
+                    widths[col_idx] = length
+        marshal.dump(row, self._file)
+        self.count += 1
+
+    def add_all(self, records):
+        for record in records:
+            self.add(record)
+
+    def write_sheet(self, wb, sheet_name):
+        """Append the spooled rows to a write-only workbook as a styled sheet"""
+        ws = wb.create_sheet(sheet_name)
+        if self.headers is not None:
+            # Widths and frozen panes go in the sheet header, so set them before the first append
+            for col_idx, width in enumerate(self.widths, 1):
+                ws.column_dimensions[get_column_letter(col_idx)].width = min(width + 2, 50)
+            ws.freeze_panes = "A2"
+            
+            header_fill = PatternFill(start_color="D63384", end_color="D63384", fill_type="solid")
+            header_font = Font(bold=True, color="FFFFFF")
+            header_alignment = Alignment(horizontal="center", vertical="center")
+            header_row = []
+            for header in self.headers:
+                cell = WriteOnlyCell(ws, value=header.replace("_", " ").title())
+                cell.fill = header_fill
+                cell.font = header_font
+                cell.alignment = header_alignment
+                header_row.append(cell)
+            ws.append(header_row)
+            
+            self._file.seek(0)
+            for _ in range(self.count):
+                ws.append(marshal.load(self._file))
+        self._file.close()
+
+
+def _stream_excel_file(filename, config):
+    """Build master.xlsx through a write-only workbook, for exports too large to hold in memory"""
+    print("Streaming dummy data...")
+    spools = {key: SheetSpool() for key in config.tables}
+    generate_sharded({key: spool.add for key, spool in spools.items()}, config)
+    with report_stage("write", filename, sum(spool.count for spool in spools.values())):
+        write_spooled_workbook(filename, spools)
+
+
+def write_spooled_workbook(filename, spools):
+    """Write {table: SheetSpool} to filename through a write-only workbook"""
+    print(f"Creating Excel workbook (write-only): {filename}")
+    wb = Workbook(write_only=True)
+    for key, spool in spools.items():
+        print(f"Creating sheet: {key.title()}")
+        spool.write_sheet(wb, key.title())
+    wb.save(filename)
+    
+    print(f"\n✅ Excel file created successfully: {filename}")
+    print(f"\nData Summary:")
+    for key, spool in spools.items():
+        print(f"  • {key.title()}: {spool.count}")
+
+
+# --- SQLite export ------------------------------------------------------------
+# Typed tables for load-testing booking/availability queries. The first column of each
+# table is its primary key; dates and times are ISO text and booleans are 0/1 integers.
+SQLITE_SCHEMA = {
+    "customers": [
+        ("customer_id", "TEXT"), ("first_name", "TEXT"), ("last_name", "TEXT"), ("email", "TEXT"),
+        ("phone", "TEXT"), ("date_registered", "TEXT"), ("total_visits", "INTEGER"),
+        ("loyalty_points", "INTEGER"), ("preferred_contact", "TEXT"), ("notes", "TEXT"),
+    ],
+    "addresses": [
+        ("address_id", "TEXT"), ("customer_id", "TEXT REFERENCES customers"), ("address_type", "TEXT"),
+        ("street_address", "TEXT"), ("apt_unit", "TEXT"), ("city", "TEXT"), ("state", "TEXT"),
+        ("zip_code", "TEXT"), ("is_default", "INTEGER"),
+    ],
+    "appointments": [
+        ("appointment_id", "TEXT"), ("customer_id", "TEXT REFERENCES customers"),
+        ("staff_id", "TEXT REFERENCES staff"), ("service_name", "TEXT"),
+        ("appointment_date", "TEXT"), ("appointment_time", "TEXT"), ("duration_minutes", "INTEGER"),
+        ("location", "TEXT"), ("status", "TEXT"), ("deposit_paid", "REAL"), ("total_amount", "REAL"),
+        ("balance_due", "REAL"), ("payment_method", "TEXT"), ("notes", "TEXT"),
+    ],
+    "products": [
+        ("product_id", "TEXT"), ("service_name", "TEXT"), ("category", "TEXT"), ("base_price", "REAL"),
+        ("duration_minutes", "INTEGER"), ("deposit_required", "REAL"), ("is_active", "INTEGER"),
+        ("description", "TEXT"), ("includes_lashes", "INTEGER"), ("includes_touch_up", "INTEGER"),
+    ],
+    "invoices": [
+        ("invoice_id", "TEXT"), ("appointment_id", "TEXT REFERENCES appointments"),
+        ("customer_id", "TEXT REFERENCES customers"), ("invoice_date", "TEXT"), ("due_date", "TEXT"),
+        ("subtotal", "REAL"), ("tax_rate", "REAL"), ("tax_amount", "REAL"), ("discount", "REAL"),
+        ("total_amount", "REAL"), ("amount_paid", "REAL"), ("balance", "REAL"), ("payment_status", "TEXT"),
+        ("payment_date", "TEXT"), ("payment_method", "TEXT"),
+    ],
+    "staff": [
+        ("staff_id", "TEXT"), ("first_name", "TEXT"), ("last_name", "TEXT"), ("role", "TEXT"), ("email", "TEXT"),
+        ("phone", "TEXT"), ("hire_date", "TEXT"), ("is_active", "INTEGER"), ("specialties", "TEXT"),
+        ("hourly_rate", "REAL"),
+    ],
+    "analytics": [
+        ("date", "TEXT"), ("total_bookings", "INTEGER"), ("completed_bookings", "INTEGER"),
+        ("cancelled_bookings", "INTEGER"), ("no_shows", "INTEGER"), ("total_revenue", "REAL"),
+        ("new_clients", "INTEGER"), ("returning_clients", "INTEGER"), ("average_service_value", "REAL"),
+        ("deposit_collected", "REAL"), ("tips_received", "REAL"),
+    ],
+    "inventory": [
+        ("item_id", "TEXT"), ("item_name", "TEXT"), ("category", "TEXT"), ("quantity", "INTEGER"), ("unit", "TEXT"),
+        ("cost_per_unit", "REAL"), ("reorder_level", "INTEGER"), ("supplier", "TEXT"), ("total_value", "REAL"),
+        ("needs_reorder", "INTEGER"), ("last_restocked", "TEXT"),
+    ],
+    "schedule": [
+        ("date", "TEXT"), ("day_of_week", "TEXT"), ("is_available", "INTEGER"), ("open_time", "TEXT"),
+        ("close_time", "TEXT"), ("total_slots", "INTEGER"), ("booked_slots", "INTEGER"),
+        ("available_slots", "INTEGER"), ("staff_assigned", "TEXT"), ("notes", "TEXT"),
+    ],
+    "settings": [
+        ("setting_id", "TEXT"), ("category", "TEXT"), ("setting_key", "TEXT"), ("setting_value", "TEXT"),
+        ("description", "TEXT"),
+    ],
+}
+# Secondary indexes, created once the rows are in (cheaper than maintaining them per insert)
+SQLITE_INDEXES = [
+    ("addresses", ["customer_id"]),
+    ("appointments", ["customer_id"]),
+    ("appointments", ["appointment_date", "appointment_time"]),
+    ("appointments", ["staff_id", "appointment_date"]),
+    ("invoices", ["appointment_id"]),
+    ("invoices", ["customer_id"]),
+    ("invoices", ["invoice_date"]),
+]
+SQLITE_BATCH_SIZE = 10000
+
+
+class SqliteTableLoader:
+    """Buffer one table's rows and insert them with executemany, a batch at a time"""
+
+    def __init__(self, connection, table):
+        columns = [column for column, _ in SQLITE_SCHEMA[table]]
+        self.connection = connection
+        self.sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        self.row = itemgetter(*columns)
+        self.rows = []
+        self.count = 0
+
+    def write(self, record):
+        """Queue one record, inserting the batch once it is full"""
+        self.rows.append(self.row(record))
+        if len(self.rows) >= SQLITE_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Insert the queued rows"""
+        self.connection.executemany(self.sql, self.rows)
+        self.count += len(self.rows)
+        self.rows.clear()
+
+
+def create_sqlite_file(filename="master.db", customer_count=DEFAULT_CUSTOMERS, appointment_count=DEFAULT_APPOINTMENTS,
+                       workers=1, seed=None, as_of=None, force=False, backend="python", tables=None):
+    """Create a SQLite database with all data (or just tables)"""
+    manifest = Manifest()
+    config = resolve_run(RunConfig(customer_count, appointment_count, seed, as_of, workers, backend,
+                                   select_tables(tables)), manifest)
+    inputs_hash = combined_hash(table_input_hashes(config), config.tables)
+    if not force and manifest.is_fresh(filename, inputs_hash):
+        print(f"⏭️  Unchanged: {filename}")
+        return
+    
+    _build_sqlite_file(filename, config)
+    manifest.record(filename, inputs_hash)
+    manifest.save(config.seed, config.as_of)
+
+
+def _build_sqlite_file(filename, config):
+    """Load every table in one transaction, then index it; the file only replaces filename once complete"""
+    print("Loading dummy data into SQLite...")
+    partial = f"{filename}.partial"
+    if os.path.exists(partial):
+        os.remove(partial)
+    
+    import sqlite3  # only the database output needs it
+    connection = sqlite3.connect(partial, isolation_level=None)
+    try:
+        # A failed load leaves only the .partial file behind, so no journal is needed
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.execute("BEGIN")
+        for table in config.tables:
+            definitions = [f"{column} {kind}" for column, kind in SQLITE_SCHEMA[table]]
+            definitions[0] += " PRIMARY KEY"
+            connection.execute(f"CREATE TABLE {table} ({', '.join(definitions)})")
+        
+        loaders = {table: SqliteTableLoader(connection, table) for table in config.tables}
+        generate_sharded({table: loader.write for table, loader in loaders.items()}, config)
+        for table, loader in loaders.items():
+            with report_stage("write", table):
+                loader.flush()
+        
+        with report_stage("index", filename):
+            for table, columns in SQLITE_INDEXES:
+                if table not in loaders:
+                    continue
+                connection.execute(f"CREATE INDEX idx_{table}_{'_'.join(columns)} ON {table} ({', '.join(columns)})")
+            connection.execute("COMMIT")
+            connection.execute("ANALYZE")
+    finally:
+        connection.close()
+    os.replace(partial, filename)
+    
+    print(f"\n✅ SQLite database created successfully: {filename}")
+    print(f"\nData Summary:")
+    for table, loader in loaders.items():
+        print(f"  • {table.title()}: {loader.count}")
+
+
+def create_json_files(customer_count=DEFAULT_CUSTOMERS, appointment_count=DEFAULT_APPOINTMENTS, stream=False,
+                      workers=1, seed=None, as_of=None, force=False, backend="python", json_format="pretty",
+                      indexes=True, tables=None, partitioned=False, compress=False):
+    """Create JSON files as fallback"""
+    if stream:
+        return stream_json_files(customer_count, appointment_count, workers, seed, as_of, force, backend,
+                                 json_format, indexes, tables, partitioned, compress)
+    
+    config = RunConfig(customer_count, appointment_count, seed, as_of, workers, backend, select_tables(tables))
+    manifest, hashes, stale = _plan_json_files(config, force, json_format, indexes, partitioned, compress)
+    
+    if stale:
+        print("Generating dummy data...")
+    data = {key: [] for key in stale}
+    builder = IndexBuilder(_indexed_tables(stale, partitioned) if indexes else [], offsets=json_format == "jsonl")
+    generate_sharded(builder.wrap({key: records.append for key, records in data.items()}), config)
+    
+    # Save individual JSON files
+    writers = {}
+    for key, value in data.items():
+        with report_stage("write", key), open_json_table(key, json_format, partitioned, compress) as writer:
+            sink = builder.wrap_writers({key: writer})[key]
+            for record in value:
+                sink(record)
+        writers[key] = writer
+    
+    _finish_json_files(manifest, config, hashes, writers, json_format, builder, partitioned, compress)
+
+
+def _indexed_tables(tables, partitioned=False):
+    """Tables whose lookup indexes are written: record positions don't apply to partitioned tables"""
+    return [key for key in tables if not (partitioned and key in PARTITIONED_TABLES)]
+
+
+def _plan_json_files(config, force, json_format, indexes=True, partitioned=False, compress=False):
+    """Resolve the config against the manifest and work out which tables need regenerating.
+    
+    A table is stale if its file (or any of its monthly files), or one of the index files
+    built from it, is out of date.
+    """
+    manifest = Manifest()
+    resolve_run(config, manifest)
+    # The same table written in another format or layout is a different file's worth of bytes
+    hashes = {}
+    for key, inputs_hash in table_input_hashes(config).items():
+        layout = json_format
+        if partitioned and key in PARTITIONED_TABLES:
+            layout += ":monthly:gzip" if compress else ":monthly"
+        hashes[key] = hashlib.sha256(f"{inputs_hash}:{layout}".encode()).hexdigest()
+    stale = []
+    for key in config.tables:
+        if partitioned and key in PARTITIONED_TABLES:
+            outputs = partition_files(key)
+        else:
+            outputs = [json_table_filename(key, json_format)]
+        if indexes:
+            outputs += [filename for table in _indexed_tables([key], partitioned)
+                        for filename in table_index_files(table, json_format)]
+        if force or not outputs or not all(manifest.is_fresh(output, hashes[key]) for output in outputs):
+            stale.append(key)
+    return manifest, hashes, stale
+
+
+def _finish_json_files(manifest, config, hashes, writers, json_format, builder, partitioned=False, compress=False):
+    """Record the rewritten tables and indexes, rebuild master_data.json if anything changed, and print a summary.
+    
+    master_data.json is only rebuilt once every table's file is up to date, which a run
+    restricted to some tables may leave it short of, and never for a partitioned run.
+    """
+    counts = {key: writer.count for key, writer in writers.items()}
+    filenames = {key: json_table_filename(key, json_format) for key in TABLE_NAMES}
+    partitions = {}
+    for key in config.tables:
+        if isinstance(writers.get(key), PartitionedTableWriter):
+            partitions[key] = writers[key]
+            for filename in writers[key].filenames():
+                manifest.record(filename, hashes[key])
+            print(f"✅ Created: {PARTITION_DIR}/{key}/ ({len(writers[key].writers)} months)")
+        elif key in counts:
+            manifest.record(filenames[key], hashes[key])
+            print(f"✅ Created: {filenames[key]}")
+        elif partitioned and key in PARTITIONED_TABLES:
+            print(f"⏭️  Unchanged: {PARTITION_DIR}/{key}/")
+        else:
+            print(f"⏭️  Unchanged: {filenames[key]}")
+    if partitions:
+        print(f"✅ Created: {write_partition_manifest(partitions, json_format, compress)}")
+    with report_stage("write", "indexes"):
+        written = builder.write(json_format)
+    for filename, table in written.items():
+        manifest.record(filename, hashes[table])
+        print(f"✅ Created: {filename}")
+    
+    master_filename = f"{JSON_DIR}/master_data.json"
+    master_hash = combined_hash(hashes)
+    if partitioned:
+        print(f"⏭️  Skipped: {master_filename} (the partitioned tables aren't repeated in one file)")
+    elif not all(key in counts or manifest.is_fresh(filename, hashes[key]) for key, filename in filenames.items()):
+        print(f"⏭️  Skipped: {master_filename} (not every table is up to date)")
+    elif counts or not manifest.is_fresh(master_filename, master_hash):
+        with report_stage("write", "master_data.json"):
+            compose_master_json(filenames, master_filename, json_format)
+        manifest.record(master_filename, master_hash)
+        print(f"✅ Created: {master_filename}")
+    else:
+        print(f"⏭️  Unchanged: {master_filename}")
+    manifest.save(config.seed, config.as_of)
+    
+    if counts:
+        print(f"\nData Summary:")
+        for key, count in counts.items():
+            print(f"  • {key.title()}: {count}")
+
+
+# Lookup indexes written next to the tables: name -> (table, key field, value field).
+# A value field of None stores the record's position in its table's array. Unique indexes
+# map each key to a single value; the others map it to a list.
+INDEXES = {
+    "customer_addresses": ("addresses", "customer_id", None, False),
+    "customer_appointments": ("appointments", "customer_id", None, False),
+    "customer_invoices": ("invoices", "customer_id", None, False),
+    "appointments_by_date": ("appointments", "appointment_date", "appointment_id", False),
+    "appointment_invoice": ("invoices", "appointment_id", None, True),
+}
+INDEX_DIR = f"{JSON_DIR}/indexes"
+
+# Tables of a .jsonl output that get byte-offset indexes -> (id field, date field or None).
+# Each index file is a JSON header line followed by fixed-width entries, sorted by key:
+# the key, NUL-padded to the header's key_width, then the record's byte offset (OFFSET_ENTRY).
+OFFSET_INDEXES = {
+    "customers": ("customer_id", None),
+    "appointments": ("appointment_id", "appointment_date"),
+    "invoices": ("invoice_id", "invoice_date"),
+}
+OFFSET_ENTRY = struct.Struct("<Q")
+
+
+def set_output_dir(directory):
+    """Write every output (workbook, database, JSON files, indexes, manifest) to directory instead"""
+    global OUTPUT_DIR, JSON_DIR, INDEX_DIR, PARTITION_DIR
+    os.makedirs(directory, exist_ok=True)
+    OUTPUT_DIR = JSON_DIR = directory
+    INDEX_DIR = f"{directory}/indexes"
+    PARTITION_DIR = f"{directory}/partitions"
+
+
+def output_filename(name):
+    """Path of an output that goes in OUTPUT_DIR (the workbook, database or manifest)"""
+    return os.path.normpath(os.path.join(OUTPUT_DIR, name))
+
+
+def index_filename(name):
+    """Path of a lookup index file"""
+    return f"{INDEX_DIR}/{name}.json"
+
+
+def table_indexes(table):
+    """Names of the indexes built from a table"""
+    return [name for name, (source, *_) in INDEXES.items() if source == table]
+
+
+def offset_index_filename(table, field, index_dir=None):
+    """Path of a .jsonl table's byte-offset index on one field"""
+    return f"{index_dir or INDEX_DIR}/{table}.{field}.offsets"
+
+
+def table_offset_indexes(table):
+    """Fields a .jsonl table has byte-offset indexes on"""
+    return [field for field in OFFSET_INDEXES.get(table, ()) if field]
+
+
+def table_index_files(table, json_format="pretty"):
+    """Every index file built from a table in the given JSON format"""
+    filenames = [index_filename(name) for name in table_indexes(table)]
+    if json_format == "jsonl":
+        filenames += [offset_index_filename(table, field) for field in table_offset_indexes(table)]
+    return filenames
+
+
+class IndexSpool:
+    """Collect an index's (key, value) pairs in a temp file, so memory stays flat.
+    
+    Pairs are spooled one at a time as they are added (holding none of them keeps the
+    records' memory free to reuse); sorted() then sorts them in runs of RUN_SIZE, spooled
+    again in marshal blocks of BLOCK_SIZE, and merges the runs back a block per run at a time.
+    """
+
+    RUN_SIZE = 1 << 16
+    BLOCK_SIZE = 1 << 8
+
+    def __init__(self):
+        self.count = 0
+        self.key_width = 0
+        self._file = tempfile.TemporaryFile()
+        self._runs = None
+
+    def add(self, key, value):
+        marshal.dump((key, value), self._file)
+        self.count += 1
+        if len(key) > self.key_width:
+            self.key_width = len(key)
+
+    def _sorted_runs(self):
+        """Sort the spooled pairs in runs; returns each run's (file position, blocks)"""
+        self._runs = tempfile.TemporaryFile()
+        self._file.seek(0)
+        runs = []
+        for start in range(0, self.count, self.RUN_SIZE):
+            # A stable sort, so pairs with the same key (a date) stay in the order they were added
+            run = sorted((marshal.load(self._file) for _ in range(min(self.RUN_SIZE, self.count - start))),
+                         key=itemgetter(0))
+            runs.append((self._runs.tell(), -(-len(run) // self.BLOCK_SIZE)))
+            for block in range(0, len(run), self.BLOCK_SIZE):
+                marshal.dump(run[block:block + self.BLOCK_SIZE], self._runs)
+        self._file.close()
+        return runs
+
+    def _run(self, position, blocks):
+        for _ in range(blocks):
+            self._runs.seek(position)
+            block = marshal.load(self._runs)
+            position = self._runs.tell()
+            yield from block
+
+    def sorted(self):
+        """Every pair, sorted by key; pairs with the same key stay in the order they were added"""
+        return heapq.merge(*(self._run(*run) for run in self._sorted_runs()), key=itemgetter(0))
+
+    def groups(self):
+        """(key, [values in the order they were added]) for each key, in key order"""
+        for key, pairs in groupby(self.sorted(), key=itemgetter(0)):
+            yield key, [value for _, value in pairs]
+
+    def close(self):
+        self._file.close()
+        if self._runs is not None:
+            self._runs.close()
+
+
+def write_offset_index(filename, table, field, spool):
+    """Write a byte-offset index of a .jsonl table: its keys sorted, each with its record's offset"""
+    data_filename = json_table_filename(table, "jsonl")
+    width = spool.key_width
+    header = {"table": table, "field": field, "data": os.path.relpath(data_filename, JSON_DIR),
+              "data_bytes": os.path.getsize(data_filename), "count": spool.count, "key_width": width}
+    pack = OFFSET_ENTRY.pack
+    with open(filename, "wb") as f:
+        f.write(json.dumps(header).encode() + b"\n")
+        entries = spool.sorted()
+        while block := list(islice(entries, 1 << 16)):
+            f.write(b"".join(key.encode().ljust(width, b"\0") + pack(offset) for key, offset in block))
+
+
+def write_index(filename, entries, json_format="pretty"):
+    """Write (key, value) entries as a JSON object, as json.dump would write the dict of them"""
+    if json_format == "pretty":
+        opening, separator, item = "{\n  ", ",\n  ", "{}: {}"
+        closing = "\n}"
+        dump = partial(json.dumps, indent=2)
+    else:
+        opening, separator, item, closing = "{", ",", "{}:{}", "}"
+        dump = _COMPACT_ENCODER.encode
+    with open(filename, "w") as f:
+        prefix = opening
+        for key, value in entries:
+            # Values are ids, dates and positions, so a nested list only needs its lines indented
+            f.write(prefix + item.format(json.dumps(key), dump(value).replace("\n", "\n  ")))
+            prefix = separator
+        f.write("{}" if prefix == opening else closing)
+
+
+class IndexBuilder:
+    """Build lookup indexes from records as they stream past on their way to a writer.
+    
+    Keys are spooled to temp files (IndexSpool) and sorted when the indexes are written, so
+    building them takes no more memory at a million rows than at a thousand; index files
+    list their keys in sorted order. With offsets=True it also builds the byte-offset
+    indexes of .jsonl tables, from the writers they are written by (see wrap_writers).
+    """
+
+    def __init__(self, tables, positions=None, offsets=False):
+        self.names = [name for table in tables for name in table_indexes(table)]
+        self.indexes = {name: IndexSpool() for name in self.names}
+        # Position of each table's first record, when records are appended to an existing table
+        self.positions = positions or {}
+        # (table, field) -> (key, byte offset) pairs
+        self.offsets = {(table, field): IndexSpool() for table in tables if offsets
+                        for field in table_offset_indexes(table)}
+
+    def load(self):
+        """Start from the existing index files (for appends); indexes without a file are dropped"""
+        for name in self.names:
+            if not os.path.exists(index_filename(name)):
+                self.indexes.pop(name).close()
+                continue
+            with open(index_filename(name)) as f:
+                existing = json.load(f)
+            unique = INDEXES[name][3]
+            for key, values in existing.items():
+                for value in [values] if unique else values:
+                    self.indexes[name].add(key, value)
+            del existing
+        self.names = list(self.indexes)
+        for table, field in list(self.offsets):
+            filename = offset_index_filename(table, field)
+            if not os.path.exists(filename):
+                self.offsets.pop((table, field)).close()
+                continue
+            spool = self.offsets[table, field]
+            with open(filename, "rb") as f:
+                width = json.loads(f.readline())["key_width"]
+                size = width + OFFSET_ENTRY.size
+                while entries := f.read(size << 12):
+                    for start in range(0, len(entries), size):
+                        spool.add(entries[start:start + width].rstrip(b"\0").decode(),
+                                  OFFSET_ENTRY.unpack_from(entries, start + width)[0])
+
+    def wrap_writers(self, writers):
+        """Return sinks that record each record's byte offset before its .jsonl writer writes it"""
+        sinks = {}
+        for table, writer in writers.items():
+            taps = [(field, self.offsets[table, field]) for field in table_offset_indexes(table)
+                    if (table, field) in self.offsets]
+            sinks[table] = self._offset_tap(taps, writer) if taps else writer.write
+        return sinks
+
+    @staticmethod
+    def _offset_tap(taps, writer):
+        def tap(record):
+            for field, spool in taps:
+                spool.add(record[field], writer.offset)
+            writer.write(record)
+        return tap
+
+    def wrap(self, sinks):
+        """Return sinks that update the indexes before passing each record on"""
+        return {table: self._tap(table, sink) for table, sink in sinks.items()}
+
+    def _tap(self, table, sink):
+        taps = [(self.indexes[name], *INDEXES[name][1:3]) for name in table_indexes(table) if name in self.indexes]
+        if not taps:
+            return sink
+        position = self.positions.get(table, 0)
+
+        def tap(record):
+            nonlocal position
+            for spool, key_field, value_field in taps:
+                spool.add(record[key_field], position if value_field is None else record[value_field])
+            position += 1
+            sink(record)
+        return tap
+
+    def write(self, json_format="pretty"):
+        """Write every index file; returns {filename: source table}"""
+        os.makedirs(INDEX_DIR, exist_ok=True)
+        written = {}
+        for name in self.names:
+            filename = index_filename(name)
+            spool = self.indexes[name]
+            # A unique index keeps the last value of a key, as a dict would
+            entries = ((key, values[-1]) for key, values in spool.groups()) if INDEXES[name][3] else spool.groups()
+            write_index(filename, entries, json_format)
+            spool.close()
+            written[filename] = INDEXES[name][0]
+        for (table, field), spool in self.offsets.items():
+            filename = offset_index_filename(table, field)
+            write_offset_index(filename, table, field, spool)
+            spool.close()
+            written[filename] = table
+        return written
+
+
+JSON_FORMATS = ["pretty", "compact", "jsonl"]
+GZIP_LEVEL = 6  # zlib's default: ~23x smaller JSON; gzip.open's 9 saves ~12% more at ~5x the time
+_COMPACT_ENCODER = json.JSONEncoder(separators=(",", ":"))
+
+
+def json_table_filename(key, json_format="pretty"):
+    """Path of a table's JSON file; JSON Lines tables get a .jsonl extension"""
+    return f"{JSON_DIR}/{key}.jsonl" if json_format == "jsonl" else f"{JSON_DIR}/{key}.json"
+
+
+class JsonTableWriter:
+    """Write one table a record at a time, serializing each record exactly once.
+    
+    pretty:  {"<table>": [...]}, byte-identical to json.dump(..., indent=2)
+    compact: {"<table>":[...]} with no whitespace (and the C encoder, so several times faster)
+    jsonl:   one record per line, so large tables can be read back line by line
+    
+    With append=True the records are added to the end of an existing file of the same format:
+    only its closing brackets are cut off and rewritten. With compress=True the file is gzipped.
+    """
+
+    def __init__(self, filename, key, json_format="pretty", append=False, compress=False):
+        if json_format not in JSON_FORMATS:
+            raise ValueError(f"Unknown JSON format: {json_format}")
+        if append and compress:
+            raise ValueError("Compressed table files can't be appended to")
+        self.filename = filename
+        self.json_format = json_format
+        self.count = 0
+        # Byte offset of the next .jsonl record (the encoder escapes to ASCII, so characters are bytes)
+        self.offset = 0
+        # Whether the file already holds records, so the first new one needs a separator
+        self._continued = False
+        if append:
+            if json_format != "jsonl":
+                self._reopen_array()
+            self._file = open(filename, "a", buffering=1 << 20)
+            self.offset = os.path.getsize(filename)
+            return
+        if compress:
+            self._file = gzip.open(filename, "wt", compresslevel=GZIP_LEVEL)
+        else:
+            self._file = open(filename, "w", buffering=1 << 20)
+        if json_format == "pretty":
+            self._file.write("{\n  %s: [" % json.dumps(key))
+        elif json_format == "compact":
+            self._file.write("{%s:[" % json.dumps(key))
+
+    def _reopen_array(self):
+        """Cut the closing brackets off an existing table file so records can be appended"""
+        with open(self.filename, "r+b") as f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(0, size - 64))
+            tail = f.read()
+            match = re.search(rb"(\[?)\s*\]\s*\}\s*$", tail)
+            if match is None:
+                raise ValueError(f"{self.filename} is not a {self.json_format} table file")
+            self._continued = not match.group(1)
+            f.truncate(size - len(tail) + match.start() + len(match.group(1)))
+
+    def write(self, record):
+        record = as_dict(record)
+        if self.json_format == "jsonl":
+            line = _COMPACT_ENCODER.encode(record)
+            self._file.write(line)
+            self._file.write("\n")
+            self.offset += len(line) + 1
+        elif self.json_format == "compact":
+            if self.count or self._continued:
+                self._file.write(",")
+            self._file.write(_COMPACT_ENCODER.encode(record))
+        else:
+            body = json.dumps(record, indent=2).replace("\n", "\n    ")
+            self._file.write(("," if self.count or self._continued else "") + "\n    " + body)
+        self.count += 1
+
+    def write_all(self, records):
+        for record in records:
+            self.write(record)
+
+    def close(self):
+        if self.json_format == "pretty":
+            self._file.write("\n  ]\n}" if self.count or self._continued else "]\n}")
+        elif self.json_format == "compact":
+            self._file.write("]}")
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def iter_json_lines(filename):
+    """Read a .jsonl table back one record at a time"""
+    with open(filename) as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def iter_json_records(filename, chunk_size=1 << 20):
+    """Read any table file back one record at a time, without loading the whole file"""
+    if filename.endswith(".jsonl"):
+        yield from iter_json_lines(filename)
+        return
+    decoder = json.JSONDecoder()
+    with open(filename) as f:
+        buffer = f.read(chunk_size)
+        pos = buffer.index("[") + 1
+        while True:
+            # Skip to the next record, reading on when the buffer runs out mid-record
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == "]":
+                return
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                more = f.read(chunk_size)
+                if not more:
+                    raise
+                buffer = buffer[pos:] + more
+                pos = 0
+                continue
+            yield record
+            pos = end
+
+
+def last_json_record(filename, tail_size=1 << 16):
+    """The last record of a table file, read from its tail (records are flat objects); None if empty"""
+    with open(filename, "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(0, size - tail_size))
+        tail = f.read().decode(errors="ignore")
+    if filename.endswith(".jsonl"):
+        return json.loads(tail.rstrip("\n").rsplit("\n", 1)[-1]) if tail.strip() else None
+    if re.search(r"\[\s*\]\s*\}\s*$", tail):
+        return None
+    return json.JSONDecoder().raw_decode(tail, tail.rindex("{"))[0]
+
+
+def _copy_bytes(src, dst, length, chunk_size=1 << 20):
+    """Copy length bytes from src to dst in bounded chunks"""
+    while length > 0:
+        chunk = src.read(min(chunk_size, length))
+        if not chunk:
+            break
+        dst.write(chunk)
+        length -= len(chunk)
+
+
+def compose_master_json(table_files, filename, json_format="pretty"):
+    """Build master_data.json from the per-table files by copying their bytes, without re-serializing.
+    
+    table_files maps table name to file. JSON Lines tables are wrapped into a compact master file.
+    """
+    with open(filename, "wb") as out:
+        if json_format == "pretty":
+            out.write(b"{\n")
+            for idx, table_file in enumerate(table_files.values()):
+                if idx:
+                    out.write(b",\n")
+                with open(table_file, "rb") as src:
+                    src.seek(2)  # skip the opening "{\n"
+                    _copy_bytes(src, out, os.path.getsize(table_file) - 4)  # and leave off the closing "\n}"
+            out.write(b"\n}")
+            return
+        
+        out.write(b"{")
+        for idx, (key, table_file) in enumerate(table_files.items()):
+            if idx:
+                out.write(b",")
+            with open(table_file, "rb") as src:
+                if json_format == "compact":
+                    src.seek(1)  # drop the outer braces
+                    _copy_bytes(src, out, os.path.getsize(table_file) - 2)
+                else:
+                    out.write(json.dumps(key).encode() + b":[")
+                    for line_idx, line in enumerate(src):
+                        if line_idx:
+                            out.write(b",")
+                        out.write(line.rstrip(b"\n"))
+                    out.write(b"]")
+        out.write(b"}")
+
+
+# --- Monthly partitions ---------------------------------------------------------
+# With partitioned=True the dated tables are written as a file per month instead of one
+# file each, optionally gzipped, so a consumer fetches and parses only the months it needs.
+# PARTITION_MANIFEST lists every month's file with its row count and first/last date.
+# master_data.json would repeat them all, so partitioned runs don't write it, and the
+# position indexes of these tables don't apply to them.
+
+# Partitioned tables -> the date field their records are split on
+PARTITIONED_TABLES = {
+    "appointments": "appointment_date",
+    "invoices": "invoice_date",
+    "analytics": "date",
+}
+PARTITION_DIR = f"{JSON_DIR}/partitions"
+PARTITION_MANIFEST = "partitions.json"
+
+
+def partition_filename(key, month, json_format="pretty", compress=False):
+    """Path of one month's file of a partitioned table"""
+    extension = "jsonl" if json_format == "jsonl" else "json"
+    return f"{PARTITION_DIR}/{key}/{month}.{extension}" + (".gz" if compress else "")
+
+
+def load_partition_manifest():
+    """The tables listed in the JSON output's PARTITION_MANIFEST, or {} if there is none"""
+    try:
+        with open(f"{JSON_DIR}/{PARTITION_MANIFEST}") as f:
+            return json.load(f)["tables"]
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def partition_files(key):
+    """Files a previous partitioned run wrote for a table (none if it wasn't partitioned)"""
+    entry = load_partition_manifest().get(key)
+    return [f"{JSON_DIR}/{shard['file']}" for shard in entry["shards"]] if entry else []
+
+
+def write_partition_manifest(partitions, json_format, compress):
+    """Update PARTITION_MANIFEST with the tables just written ({table: PartitionedTableWriter})"""
+    tables = load_partition_manifest()
+    for key, writer in partitions.items():
+        tables[key] = {
+            "date_field": writer.date_field,
+            "format": json_format,
+            "compression": "gzip" if compress else None,
+            "rows": writer.count,
+            "shards": writer.shards(),
+        }
+    filename = f"{JSON_DIR}/{PARTITION_MANIFEST}"
+    with open(filename, "w") as f:
+        json.dump({"tables": {key: tables[key] for key in TABLE_NAMES if key in tables}}, f, indent=2)
+    return filename
+
+
+class PartitionedTableWriter:
+    """Write one table as a file per month of its date field; used like a JsonTableWriter.
+    
+    Each month's file is a complete table file of the chosen format, its records in the
+    order they were generated. Months a previous run wrote for the table are removed.
+    """
+
+    def __init__(self, key, json_format="pretty", compress=False):
+        self.key = key
+        self.date_field = PARTITIONED_TABLES[key]
+        self.json_format = json_format
+        self.compress = compress
+        self.count = 0
+        self.writers = {}  # month -> JsonTableWriter
+        self.ranges = {}  # month -> [first date, last date]
+        directory = f"{PARTITION_DIR}/{key}"
+        if os.path.isdir(directory):
+            shutil.rmtree(directory)
+        os.makedirs(directory)
+
+    def write(self, record):
+        date = record[self.date_field]
+        month = date[:7]
+        writer = self.writers.get(month)
+        if writer is None:
+            writer = self.writers[month] = JsonTableWriter(
+                partition_filename(self.key, month, self.json_format, self.compress), self.key, self.json_format,
+                compress=self.compress)
+            self.ranges[month] = [date, date]
+        else:
+            dates = self.ranges[month]
+            if date < dates[0]:
+                dates[0] = date
+            elif date > dates[1]:
+                dates[1] = date
+        writer.write(record)
+        self.count += 1
+
+    def write_all(self, records):
+        for record in records:
+            self.write(record)
+
+    def filenames(self):
+        return [writer.filename for writer in self.writers.values()]
+
+    def shards(self):
+        """A manifest entry per month: file (relative to the JSON directory), rows and date range"""
+        return [{
+            "month": month,
+            "file": os.path.relpath(writer.filename, JSON_DIR),
+            "rows": writer.count,
+            "first_date": self.ranges[month][0],
+            "last_date": self.ranges[month][1],
+            "bytes": os.path.getsize(writer.filename),
+        } for month, writer in sorted(self.writers.items())]
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_json_table(key, json_format="pretty", partitioned=False, compress=False):
+    """Writer for one table of the JSON output: its own file, or a file per month if partitioned"""
+    if partitioned and key in PARTITIONED_TABLES:
+        return PartitionedTableWriter(key, json_format, compress)
+    return JsonTableWriter(json_table_filename(key, json_format), key, json_format)
+
+
+def stream_json_files(customer_count=DEFAULT_CUSTOMERS, appointment_count=DEFAULT_APPOINTMENTS, workers=1, seed=None,
+                      as_of=None, force=False, backend="python", json_format="pretty", indexes=True, tables=None,
+                      partitioned=False, compress=False):
+    """Create JSON files with flat memory: every table is written while it is generated.
+    
+    The lookup indexes (if enabled) are spooled to temp files and sorted at the end.
+    With partitioned=True the dated tables get a (optionally gzipped) file per month.
+    """
+    config = RunConfig(customer_count, appointment_count, seed, as_of, workers, backend, select_tables(tables))
+    manifest, hashes, stale = _plan_json_files(config, force, json_format, indexes, partitioned, compress)
+    
+    if stale:
+        print("Streaming dummy data...")
+    builder = IndexBuilder(_indexed_tables(stale, partitioned) if indexes else [], offsets=json_format == "jsonl")
+    with ExitStack() as stack:
+        writers = {key: stack.enter_context(open_json_table(key, json_format, partitioned, compress))
+                   for key in stale}
+        generate_sharded(builder.wrap(builder.wrap_writers(writers)), config)
+    
+    _finish_json_files(manifest, config, hashes, writers, json_format, builder, partitioned, compress)
+
+
+# --- Append mode ----------------------------------------------------------------
+# Extends an existing dataset with new customers (and their addresses), appointments and
+# invoices. Ids continue from the current maximum and appointments only go into slots that
+# are still free. From the existing rows only what is needed is read: the customer ids,
+# the bookings, the staff and the max ids; the rows themselves are never rewritten.
+# Analytics and the schedule are re-aggregated, and the lookup indexes extended.
+
+# Tables an append adds rows to: table -> (id field, id format)
+APPEND_TABLES = {
+    "customers": ("customer_id", "CUST{:04d}"),
+    "addresses": ("address_id", "ADDR{:04d}"),
+    "appointments": ("appointment_id", "APT{:04d}"),
+    "invoices": ("invoice_id", "INV{:05d}"),
+}
+
+
+def id_number(value):
+    """Numeric part of an id such as CUST0042"""
+    return int(value[len(value.rstrip("0123456789")):])
+
+
+def artist_lane(staff_id):
+    """Inverse of artist_id()"""
+    number = id_number(staff_id)
+    return 1 if number == 1 else number - 1
+
+
+class ExistingDataset:
+    """What an append needs to know about the rows already in a dataset"""
+
+    def __init__(self, config):
+        self.config = config
+        self.max_ids = dict.fromkeys(APPEND_TABLES, 0)
+        self.counts = dict.fromkeys(TABLE_NAMES, 0)
+        self.customer_ids = []
+        self.staff_ids = set()
+        self.artists = 1
+        # (artist lane, date, start minute, duration) of every appointment
+        self.bookings = []
+        self.analytics = AnalyticsRollup(config)
+        # The analytics table as it is, and the dates an append recomputed (None: all of them)
+        self.analytics_rows = []
+        self.analytics_changed = None
+        self.schedule = ScheduleBuilder(config)
+
+    def add(self, table, record):
+        """Take what is needed from one existing record"""
+        self.counts[table] += 1
+        if table in APPEND_TABLES:
+            id_field, _ = APPEND_TABLES[table]
+            self.max_ids[table] = max(self.max_ids[table], id_number(record[id_field]))
+        if table == "customers":
+            self.customer_ids.append(record["customer_id"])
+        elif table == "staff":
+            self.staff_ids.add(record["staff_id"])
+            if record["staff_id"] != "STAFF002":
+                self.artists = max(self.artists, artist_lane(record["staff_id"]))
+        elif table == "appointments":
+            hour, minute = record["appointment_time"].split(":")
+            self.bookings.append((artist_lane(record.get("staff_id") or "STAFF001"), record["appointment_date"],
+                                  int(hour) * 60 + int(minute), record["duration_minutes"]))
+            self.analytics.add(table, record)
+            self.schedule.add(table, record)
+        elif table == "invoices":
+            self.analytics.add(table, record)
+        elif table == "analytics":
+            self.analytics_rows.append(record)
+
+    def add_last(self, table, record):
+        """Take a table's max id and row count from its last record alone (ids are consecutive)"""
+        if record is not None:
+            id_field, _ = APPEND_TABLES[table]
+            self.max_ids[table] = self.counts[table] = id_number(record[id_field])
+
+    def customer_pool(self, new_count):
+        """Customer ids new appointments can be booked for: the existing ones plus the new ones"""
+        existing = self.max_ids["customers"]
+        if len(self.customer_ids) == existing and all(
+                value == customer_id(number) for number, value in enumerate(self.customer_ids, 1)):
+            return IdSequence(existing + new_count)
+        return self.customer_ids + [customer_id(number) for number in range(existing + 1, existing + new_count + 1)]
+
+
+def generate_append(sinks, existing, config):
+    """Generate config's customers and appointments as new rows after the existing ones.
+    
+    New rows of customers, addresses, appointments, invoices and staff (artists added to
+    keep up with the bookings) go to sinks. Returns ({table: new rows}, {table: records})
+    where the second dict holds the re-aggregated analytics and schedule; only the analytics
+    days the new rows touched are recomputed (see existing.analytics_changed).
+    """
+    seed, as_of = config.seed, config.as_of
+    counts = dict.fromkeys(sinks, 0)
+    existing.analytics.mark_written()
+
+    def emit(table, record):
+        counts[table] += 1
+        sinks[table](record)
+
+    def renumbered(table, records):
+        id_field, id_format = APPEND_TABLES[table]
+        for number, record in enumerate(records, existing.max_ids[table] + 1):
+            record[id_field] = id_format.format(number)
+            yield record
+
+    first_customer = existing.max_ids["customers"] + 1
+    customers = list(iter_customers(config.customer_count, table_rng(seed, "customers", first_customer),
+                                    first_customer, as_of))
+    for record in customers:
+        emit("customers", record)
+    for record in renumbered("addresses", iter_addresses(customers, table_rng(seed, "addresses", first_customer))):
+        emit("addresses", record)
+
+    # Book around the existing appointments, adding artists if the calendar would get too full
+    days = open_days(seed, as_of)
+    window_start = as_of - timedelta(days=90)
+    window = {(window_start + timedelta(days=offset)).strftime("%Y-%m-%d") for offset, *_ in days}
+    booked = sum(1 for booking in existing.bookings if booking[1] in window)
+    lanes = max(existing.artists, artist_count(booked + config.appointment_count, days))
+    first_appointment = existing.max_ids["appointments"] + 1
+    calendar = AvailabilityCalendar(seed, as_of, lanes, rng=table_rng(seed, "calendar", first_appointment))
+    for booking in existing.bookings:
+        calendar.reserve(*booking)
+    for record in generate_staff(lanes, table_rng(seed, "staff", lanes)):
+        if record["staff_id"] not in existing.staff_ids:
+            emit("staff", record)
+    existing.schedule.artists = lanes
+
+    def new_appointments():
+        for record in iter_appointments(existing.customer_pool(config.customer_count), config.appointment_count,
+                                        table_rng(seed, "appointments", first_appointment), first_appointment,
+                                        as_of, calendar):
+            emit("appointments", record)
+            existing.analytics.add("appointments", record)
+            existing.schedule.add("appointments", record)
+            yield record
+
+    invoices = iter_invoices(new_appointments(), table_rng(seed, "invoices", first_appointment))
+    for record in renumbered("invoices", invoices):
+        emit("invoices", record)
+        existing.analytics.add("invoices", record)
+    analytics, existing.analytics_changed = existing.analytics.update(existing.analytics_rows)
+    return counts, {"analytics": analytics, "schedule": existing.schedule.records()}
+
+
+def append_config(customer_count, appointment_count, seed, as_of):
+    """The run settings of an append: the dataset's own seed and as-of date, unless overridden"""
+    manifest = Manifest()
+    if manifest.as_of is not None:
+        dataset_as_of = datetime.strptime(manifest.as_of, "%Y-%m-%d")
+        if as_of is None:
+            as_of = dataset_as_of
+        elif resolve_as_of(as_of) != dataset_as_of:
+            print(f"⚠️  --as-of {as_of:%Y-%m-%d} differs from the dataset's as-of date ({manifest.as_of}): "
+                  "new bookings and the 90-day analytics window follow --as-of")
+    return resolve_run(RunConfig(customer_count, appointment_count, seed, as_of), manifest)
+
+
+def append_json_files(customer_count=DEFAULT_CUSTOMERS, appointment_count=DEFAULT_APPOINTMENTS, seed=None, as_of=None,
+                      json_format="pretty", indexes=True):
+    """Add customers, appointments and invoices to the existing JSON files, writing only the new rows"""
+    filenames = {key: json_table_filename(key, json_format) for key in TABLE_NAMES}
+    for filename in filenames.values():
+        if not os.path.exists(filename):
+            raise SystemExit(f"Nothing to append to: {filename} doesn't exist. Generate the data first.")
+    config = append_config(customer_count, appointment_count, seed, as_of)
+    
+    print("Reading existing data...")
+    existing = ExistingDataset(config)
+    with report_stage("read", "existing data") as entry:
+        for key in ("staff", "customers", "appointments", "invoices", "analytics"):
+            for record in iter_json_records(filenames[key]):
+                existing.add(key, record)
+        existing.add_last("addresses", last_json_record(filenames["addresses"]))
+        entry["rows"] = sum(existing.counts.values())
+    
+    print("Appending dummy data...")
+    builder = IndexBuilder(APPEND_TABLES if indexes else [], positions=existing.counts,
+                           offsets=json_format == "jsonl")
+    builder.load()
+    appended = [*APPEND_TABLES, "staff"]
+    with ExitStack() as stack, report_stage("generate") as entry:
+        writers = {key: stack.enter_context(JsonTableWriter(filenames[key], key, json_format, append=True))
+                   for key in appended}
+        sinks = report_sinks(builder.wrap(builder.wrap_writers(writers)))
+        counts, derived = generate_append(sinks, existing, config)
+        entry["rows"] = sum(counts.values())
+    changed = existing.analytics_changed
+    if changed is not None and not changed:
+        del derived["analytics"]
+    for key, records in derived.items():
+        with report_stage("write", key, len(records)), JsonTableWriter(filenames[key], key, json_format) as writer:
+            writer.write_all(records)
+    
+    for key in appended:
+        print(f"✅ Appended: {filenames[key]} (+{counts[key]})")
+    for key in derived:
+        days = f" ({len(changed)} days recomputed)" if key == "analytics" and changed is not None else ""
+        print(f"✅ Created: {filenames[key]}{days}")
+    with report_stage("write", "indexes"):
+        written = builder.write(json_format)
+    for filename in written:
+        print(f"✅ Created: {filename}")
+    master_filename = f"{JSON_DIR}/master_data.json"
+    with report_stage("write", "master_data.json"):
+        compose_master_json(filenames, master_filename, json_format)
+    print(f"✅ Created: {master_filename}")
+
+
+def sheet_field(header):
+    """Record field name of a sheet's column header ("Customer Id" -> "customer_id")"""
+    return header.lower().replace(" ", "_")
+
+
+def append_excel_file(filename="master.xlsx", customer_count=DEFAULT_CUSTOMERS, appointment_count=DEFAULT_APPOINTMENTS,
+                      seed=None, as_of=None):
+    """Add customers, appointments and invoices to the sheets of an existing master.xlsx.
+    
+    An .xlsx file is a zip of XML parts, so the workbook is loaded and saved whole here;
+    use the JSON files for appends at scale.
+    """
+    if not excel_available():
+        print("Appending to JSON files instead...")
+        return append_json_files(customer_count, appointment_count, seed, as_of)
+    if not os.path.exists(filename):
+        raise SystemExit(f"Nothing to append to: {filename} doesn't exist. Generate the data first.")
+    config = append_config(customer_count, appointment_count, seed, as_of)
+    
+    print(f"Reading existing data: {filename}")
+    with report_stage("read", filename) as entry:
+        wb = load_workbook(filename)
+        sheets = {key: wb[key.title()] for key in TABLE_NAMES}
+        fields = {key: [sheet_field(cell.value) for cell in next(ws.iter_rows(max_row=1))]
+                  for key, ws in sheets.items()}
+        existing = ExistingDataset(config)
+        for key in ("staff", "customers", "addresses", "appointments", "invoices", "analytics"):
+            for values in sheets[key].iter_rows(min_row=2, values_only=True):
+                existing.add(key, dict(zip(fields[key], values)))
+        entry["rows"] = sum(existing.counts.values())
+    
+    print("Appending dummy data...")
+    sinks = {key: (lambda record, ws=sheets[key], headers=fields[key]: ws.append([record[h] for h in headers]))
+             for key in [*APPEND_TABLES, "staff"]}
+    with report_stage("generate") as entry:
+        counts, derived = generate_append(report_sinks(sinks), existing, config)
+        entry["rows"] = sum(counts.values())
+    changed = existing.analytics_changed
+    with report_stage("write", filename):
+        for key, records in derived.items():
+            ws = sheets[key]
+            if key == "analytics" and changed is not None:
+                # Only the recomputed days' rows are rewritten, in place
+                for row, record in enumerate(records, 2):
+                    if record["date"] in changed:
+                        for column, header in enumerate(fields[key], 1):
+                            ws.cell(row, column, record[header])
+                continue
+            ws.delete_rows(2, ws.max_row)
+            for record in records:
+                ws.append([record[header] for header in fields[key]])
+        wb.save(filename)
+    
+    print(f"\n✅ Excel file updated successfully: {filename}")
+    print(f"\nAppended:")
+    for key, count in counts.items():
+        print(f"  • {key.title()}: +{count}")
+    if changed is not None:
+        print(f"  • Analytics: {len(changed)} days recomputed")
+
+
+# --- Workbook import ------------------------------------------------------------
+# import_excel_file is the way back from a hand-edited master.xlsx to the JSON files. Each
+# sheet is streamed in read-only mode, its title-cased headers mapped back to field names
+# (sheet_field) and its cells restored to the JSON types, by SQLITE_SCHEMA's column types,
+# as each row goes to its JsonTableWriter. A sheet is only read if its part of the .xlsx
+# zip (or the shared strings it may use) changed since its JSON file was last written.
+
+# INTEGER columns of SQLITE_SCHEMA that hold true/false
+BOOLEAN_FIELDS = {"is_default", "is_active", "includes_lashes", "includes_touch_up", "needs_reorder", "is_available"}
+# TEXT columns the generator leaves null (a closed day's hours), rather than ""
+NULLABLE_FIELDS = {"open_time", "close_time", "staff_assigned"}
+_SHEET_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_RELATIONSHIP_ID = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+# A cell holding a shared string's index: <c r="A2" t="s"><v>12</v></c>
+_SHARED_STRING_CELL = re.compile(rb'<c\b[^>]*\bt="s"[^>]*>\s*<v>(\d+)</v>')
+
+
+def _cell_text(value):
+    """A TEXT column's value: dates and times as the generator writes them, empty cells as \"\" """
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, date):
+        return value.isoformat()
+    if hasattr(value, "strftime"):  # a time of day
+        return value.strftime("%H:%M")
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _cell_real(value):
+    """A REAL column's value as a float (Excel hands back whole amounts as ints)"""
+    try:
+        return float(value) if value is not None and not isinstance(value, bool) else value
+    except ValueError:
+        return value  # left for --validate to report
+
+
+def _cell_integer(value):
+    """An INTEGER column's value as an int"""
+    try:
+        return int(float(value)) if value is not None and float(value).is_integer() else value
+    except (TypeError, ValueError):
+        return value
+
+
+def _cell_boolean(value):
+    """A true/false column's value as a bool"""
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "yes", "1")
+    return value if value is None else bool(value)
+
+
+def _cell_value(value):
+    """A column the schema doesn't know: dates as text, anything else as read"""
+    return _cell_text(value) if isinstance(value, date) else value
+
+
+def sheet_converters(table, fields):
+    """A function per column restoring a sheet's cells to the types of the table's JSON records"""
+    types = {name: column_type.split()[0] for name, column_type in SQLITE_SCHEMA[table]}
+    converters = {"TEXT": _cell_text, "REAL": _cell_real, "INTEGER": _cell_integer}
+    return [_cell_boolean if field in BOOLEAN_FIELDS else
+            _cell_value if field in NULLABLE_FIELDS else converters.get(types.get(field), _cell_value)
+            for field in fields]
+
+
+def _shared_strings(archive):
+    """The workbook's shared strings in index order (rich text runs joined), as escaped XML text"""
+    from xml.etree import ElementTree
+    from xml.sax.saxutils import escape
+    if "xl/sharedStrings.xml" not in archive.namelist():
+        return []
+    strings = []
+    with archive.open("xl/sharedStrings.xml") as f:
+        for _, element in ElementTree.iterparse(f):
+            if element.tag == f"{_SHEET_NS}si":
+                strings.append(escape("".join(text.text or "" for text in element.iter(f"{_SHEET_NS}t"))).encode())
+                element.clear()
+    return strings
+
+
+def _sheet_digest(archive, name, strings):
+    """Hash of a sheet's XML with each shared-string index replaced by its string, scanned in chunks"""
+    digest = hashlib.sha256()
+    rest = b""
+    with archive.open(name) as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            data = rest + chunk
+            # Hash up to the last complete cell, keeping the rest for the next chunk
+            end = data.rfind(b"</c>") + len(b"</c>")
+            if end < len(b"</c>"):
+                rest = data
+                continue
+            position = 0
+            for match in _SHARED_STRING_CELL.finditer(data, 0, end):
+                digest.update(data[position:match.start(1)])
+                digest.update(strings[int(match[1])])
+                position = match.end(1)
+            digest.update(data[position:end])
+            rest = data[end:]
+        digest.update(rest)
+    return digest.hexdigest()
+
+
+def sheet_fingerprints(filename):
+    """{sheet title: hash of its contents}, from the .xlsx zip without loading the workbook.
+    
+    A sheet's cells hold indexes into the workbook-wide shared strings, and programs that
+    rebuild sharedStrings.xml on save renumber them, so neither the shared strings nor a
+    sheet's raw XML tells whether the sheet itself changed. The hash is of the sheet's XML
+    with each index replaced by its string, which only an edit of that sheet changes.
+    """
+    import zipfile
+    from xml.etree import ElementTree
+    with zipfile.ZipFile(filename) as archive:
+        names = set(archive.namelist())
+        targets = {rel.get("Id"): rel.get("Target")
+                   for rel in ElementTree.fromstring(archive.read("xl/_rels/workbook.xml.rels"))}
+        strings = _shared_strings(archive)
+        fingerprints = {}
+        for sheet in ElementTree.fromstring(archive.read("xl/workbook.xml")).iter(f"{_SHEET_NS}sheet"):
+            target = targets.get(sheet.get(_RELATIONSHIP_ID), "")
+            name = target.lstrip("/") if target.startswith("/") else f"xl/{target}"
+            fingerprints[sheet.get("name")] = _sheet_digest(archive, name, strings) if name in names else "-"
+        return fingerprints
+
+
+def import_excel_file(filename="master.xlsx", json_format="pretty", indexes=True, force=False):
+    """Write the JSON files from the sheets of a (hand-edited) master.xlsx, a row at a time.
+    
+    Sheets whose part of the workbook hasn't changed since their JSON file was written from
+    it are skipped; master_data.json and the lookup indexes of the imported tables are rebuilt.
+    """
+    if not excel_available():
+        raise SystemExit("Importing a workbook needs openpyxl")
+    if not os.path.exists(filename):
+        raise SystemExit(f"Nothing to import: {filename} doesn't exist.")
+    manifest = Manifest()
+    fingerprints = sheet_fingerprints(filename)
+    filenames = {key: json_table_filename(key, json_format) for key in TABLE_NAMES}
+    hashes = {key: hashlib.sha256(f"{filename}:{fingerprints[key.title()]}:{json_format}".encode()).hexdigest()
+              for key in TABLE_NAMES if key.title() in fingerprints}
+    stale = [key for key in hashes
+             if force or not all(manifest.is_fresh(output, hashes[key])
+                                 for output in [filenames[key], *(table_index_files(key, json_format)
+                                                                  if indexes else [])])]
+    
+    print(f"Importing {filename}...")
+    builder = IndexBuilder(stale if indexes else [], offsets=json_format == "jsonl")
+    wb = load_workbook(filename, read_only=True)
+    try:
+        for key in TABLE_NAMES:
+            if key not in hashes:
+                print(f"⏭️  Skipped: {key} (no {key.title()} sheet)")
+                continue
+            if key not in stale:
+                print(f"⏭️  Unchanged: {filenames[key]}")
+                continue
+            rows = wb[key.title()].iter_rows(values_only=True)
+            headers = next(rows, ())
+            columns = [(idx, sheet_field(header)) for idx, header in enumerate(headers) if header is not None]
+            fields = [field for _, field in columns]
+            converters = sheet_converters(key, fields)
+            with report_stage("import", key) as entry, JsonTableWriter(filenames[key], key, json_format) as writer:
+                sink = builder.wrap(builder.wrap_writers({key: writer}))[key]
+                for values in rows:
+                    cells = [values[idx] if idx < len(values) else None for idx, _ in columns]
+                    if all(cell is None for cell in cells):
+                        continue  # formatted but empty rows
+                    sink({field: convert(cell) for field, convert, cell in zip(fields, converters, cells)})
+                entry["rows"] = writer.count
+            manifest.record(filenames[key], hashes[key])
+            print(f"✅ Created: {filenames[key]} ({writer.count} rows)")
+    finally:
+        wb.close()
+    
+    with report_stage("write", "indexes"):
+        written = builder.write(json_format)
+    for index_file, table in written.items():
+        manifest.record(index_file, hashes[table])
+        print(f"✅ Created: {index_file}")
+    master_filename = f"{JSON_DIR}/master_data.json"
+    if not all(os.path.exists(table_file) for table_file in filenames.values()):
+        print(f"⏭️  Skipped: {master_filename} (not every table has a {json_format} file)")
+    elif stale or not os.path.exists(master_filename):
+        with report_stage("write", "master_data.json"):
+            compose_master_json(filenames, master_filename, json_format)
+        print(f"✅ Created: {master_filename}")
+    else:
+        print(f"⏭️  Unchanged: {master_filename}")
+    manifest.save(manifest.seed)
+
+
+# --- Validation -----------------------------------------------------------------
+# validate_json_files checks a JSON output the way its consumers rely on it, whether it was
+# generated, appended to or edited by hand. Every table is streamed once, in shards (byte
+# ranges of a .jsonl file, a partitioned table's months, else whole files) checked in
+# parallel row by row; the shards hand back their keys and references, which are then
+# joined through hash sets and dicts rather than looked up row against row.
+
+# Table -> its primary key field
+PRIMARY_KEYS = {
+    "customers": "customer_id",
+    "addresses": "address_id",
+    "appointments": "appointment_id",
+    "products": "product_id",
+    "invoices": "invoice_id",
+    "staff": "staff_id",
+    "analytics": "date",
+    "inventory": "item_id",
+    "schedule": "date",
+    "settings": "setting_id",
+}
+# (table, field) -> (table, field) every value of it must appear in
+FOREIGN_KEYS = {
+    ("addresses", "customer_id"): ("customers", "customer_id"),
+    ("appointments", "customer_id"): ("customers", "customer_id"),
+    ("appointments", "staff_id"): ("staff", "staff_id"),
+    ("appointments", "service_name"): ("products", "service_name"),
+    ("invoices", "appointment_id"): ("appointments", "appointment_id"),
+    ("invoices", "customer_id"): ("customers", "customer_id"),
+}
+VALIDATION_SHARD_BYTES = 32 << 20
+VALIDATION_BATCH_BYTES = 4 << 20  # of a .jsonl shard parsed at once
+VALIDATION_BATCH_ROWS = 10000  # of other table files
+VALIDATION_EXAMPLES = 5  # problem rows printed per check
+CENT = 0.01 + 1e-9  # amounts are rounded to cents, so may be a cent apart
+
+
+def _problem(problems, check, example):
+    """Count a failed check, keeping the first few examples"""
+    entry = problems.setdefault(check, [0, []])
+    entry[0] += 1
+    if len(entry[1]) < VALIDATION_EXAMPLES:
+        entry[1].append(example)
+
+
+def _check_appointment(record, problems):
+    """Row checks of an appointment; returns what the invoice checks need of it"""
+    appointment_id, status = record["appointment_id"], record["status"]
+    if status not in STATUSES:
+        _problem(problems, "appointment status", f"{appointment_id}: unknown status {status!r}")
+    elif status == "completed":
+        if record["balance_due"] or not record["payment_method"]:
+            _problem(problems, "appointment status", f"{appointment_id}: completed with balance_due "
+                                                     f"{record['balance_due']} and payment_method "
+                                                     f"{record['payment_method']!r}")
+    elif record["payment_method"]:
+        _problem(problems, "appointment status", f"{appointment_id}: {status} but paid by {record['payment_method']}")
+    elif abs(record["deposit_paid"] + record["balance_due"] - record["total_amount"]) > CENT:
+        _problem(problems, "appointment amounts", f"{appointment_id}: deposit_paid {record['deposit_paid']} + "
+                                                  f"balance_due {record['balance_due']} != total_amount "
+                                                  f"{record['total_amount']}")
+    return appointment_id, record["customer_id"], status, record["total_amount"], record["appointment_date"]
+
+
+def _check_invoice(record, problems):
+    """Row checks of an invoice; returns what the appointment checks need of it"""
+    invoice_id, subtotal, total = record["invoice_id"], record["subtotal"], record["total_amount"]
+    tax, discount = record["tax_amount"], record["discount"]
+    if abs(tax - round(subtotal * record["tax_rate"] / 100, 2)) > CENT:
+        _problem(problems, "invoice arithmetic", f"{invoice_id}: tax_amount {tax} != {record['tax_rate']}% "
+                                                 f"of subtotal {subtotal}")
+    if abs(total - (subtotal + tax - discount)) > CENT:
+        _problem(problems, "invoice arithmetic", f"{invoice_id}: total_amount {total} != subtotal {subtotal} "
+                                                 f"+ tax_amount {tax} - discount {discount}")
+    if abs(record["balance"] - (total - record["amount_paid"])) > CENT:
+        _problem(problems, "invoice arithmetic", f"{invoice_id}: balance {record['balance']} != total_amount "
+                                                 f"{total} - amount_paid {record['amount_paid']}")
+    if record["payment_status"] == "paid" and (record["balance"] or not record["payment_date"]):
+        _problem(problems, "invoice status", f"{invoice_id}: paid with balance {record['balance']} and "
+                                             f"payment_date {record['payment_date']!r}")
+    if record["due_date"] < record["invoice_date"]:
+        _problem(problems, "invoice status", f"{invoice_id}: due {record['due_date']} before its date "
+                                             f"{record['invoice_date']}")
+    return invoice_id, record["appointment_id"], record["customer_id"], subtotal, record["invoice_date"]
+
+
+ROW_CHECKS = {
+    "appointments": _check_appointment,
+    "invoices": _check_invoice,
+}
+
+
+def validation_shards(table, json_format="pretty"):
+    """Tasks validating one table: (table, filename, start, end) byte ranges of it, [] if it's missing"""
+    filename = json_table_filename(table, json_format)
+    if not os.path.exists(filename):
+        return [(table, partition, 0, None) for partition in partition_files(table)]
+    if json_format != "jsonl":
+        return [(table, filename, 0, None)]
+    size = os.path.getsize(filename)
+    return [(table, filename, start, start + VALIDATION_SHARD_BYTES)
+            for start in range(0, max(size, 1), VALIDATION_SHARD_BYTES)]
+
+
+def _parse_lines(block, filename, problems):
+    """Records of a block of whole .jsonl lines, parsed as one array; unparseable lines are problems"""
+    try:
+        return json.loads(b"[" + block.rstrip(b"\n").replace(b"\n", b",") + b"]")
+    except ValueError:
+        records = []
+        for line in block.splitlines():
+            if line.strip():
+                try:
+                    records.append(json.loads(line))
+                except ValueError as e:
+                    _problem(problems, "malformed row", f"{os.path.basename(filename)}: {e}")
+        return records
+
+
+def _shard_batches(table, filename, start, end, problems):
+    """Records of a shard, in lists: the lines of a .jsonl file starting in [start, end), or a whole table file"""
+    if end is None:
+        if not filename.endswith(".gz"):
+            records = iter_json_records(filename)
+        elif ".jsonl" in filename:
+            records = map(json.loads, gzip.open(filename, "rt"))
+        else:
+            with gzip.open(filename, "rt") as f:
+                records = iter(json.load(f)[table])
+        while batch := list(islice(records, VALIDATION_BATCH_ROWS)):
+            yield batch
+        return
+    with open(filename, "rb") as f:
+        if start:
+            # Skip the line that started before this shard: the previous shard reads it
+            f.seek(start - 1)
+            f.readline()
+        position = f.tell()
+        while position < end:
+            block = f.read(min(VALIDATION_BATCH_BYTES, end - position))
+            if not block:
+                break
+            if not block.endswith(b"\n"):
+                block += f.readline()
+            position += len(block)
+            yield _parse_lines(block, filename, problems)
+
+
+def validate_shard(task):
+    """Check one shard's rows on their own; returns what the cross-table checks need. Runs inside pool workers."""
+    table, filename, start, end = task
+    key_field = PRIMARY_KEYS[table]
+    references = {field: set() for source, field in FOREIGN_KEYS if source == table}
+    targets = {field: set() for target, field in FOREIGN_KEYS.values() if target == table and field != key_field}
+    keys, joined, problems = [], [], {}
+    row_check = ROW_CHECKS.get(table)
+    for batch in _shard_batches(table, filename, start, end, problems):
+        keys += [record.get(key_field) for record in batch]
+        for field, values in (*references.items(), *targets.items()):
+            values.update([record.get(field) for record in batch])
+        if row_check:
+            for record in batch:
+                try:
+                    joined.append(row_check(record, problems))
+                except (KeyError, TypeError, ValueError) as e:
+                    _problem(problems, "malformed row", f"{record.get(key_field)}: {e!r}")
+    return table, keys, references, targets, joined, problems
+
+
+def validate_json_files(json_format="pretty", workers=1):
+    """Check the JSON output for duplicate ids, dangling references, invoice arithmetic and status mismatches.
+    
+    Prints a line per table and per failed check, and returns True if everything passed.
+    """
+    lap = _stopwatch()
+    tasks = {table: validation_shards(table, json_format) for table in TABLE_NAMES}
+    print(f"Validating {JSON_DIR} ({json_format}, {sum(map(len, tasks.values()))} shards)...")
+    problems = {}
+    for table, shards in tasks.items():
+        if not shards:
+            _problem(problems, "missing table", f"{json_table_filename(table, json_format)} doesn't exist")
+    
+    keys = {table: set() for table in TABLE_NAMES}
+    rows = dict.fromkeys(TABLE_NAMES, 0)
+    values = {}  # (table, field) -> every value referenced, or every value referenced fields may take
+    appointments, invoices = {}, []
+    pool = None
+    if workers > 1:
+        import multiprocessing  # only pool runs pay for importing it
+        pool = multiprocessing.Pool(workers)
+    try:
+        all_tasks = [task for shards in tasks.values() for task in shards]
+        results = pool.imap(validate_shard, all_tasks) if pool else map(validate_shard, all_tasks)
+        for table, shard_keys, references, targets, joined, shard_problems in results:
+            seen = keys[table]
+            for key in shard_keys:
+                if key in seen:
+                    _problem(problems, "duplicate id", f"{table}: {key}")
+                seen.add(key)
+            rows[table] += len(shard_keys)
+            for field, shard_values in (*references.items(), *targets.items()):
+                values.setdefault((table, field), set()).update(shard_values)
+            if table == "appointments":
+                appointments.update((entry[0], entry[1:]) for entry in joined)
+            elif table == "invoices":
+                invoices += joined
+            for check, (count, examples) in shard_problems.items():
+                entry = problems.setdefault(check, [0, []])
+                entry[0] += count
+                entry[1] += examples[:VALIDATION_EXAMPLES - len(entry[1])]
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    
+    for (source, field), (target, target_field) in FOREIGN_KEYS.items():
+        if not tasks[source] or not tasks[target]:
+            continue
+        allowed = keys[target] if target_field == PRIMARY_KEYS[target] else values[target, target_field]
+        for value in sorted(values[source, field] - allowed, key=str):
+            _problem(problems, "unknown reference",
+                     f"{source}.{field} {value!r} not found in {target}.{target_field}")
+    
+    # Each invoice against its appointment, then the completed appointments left without one
+    if tasks["appointments"] and tasks["invoices"]:
+        invoiced = set()
+        for invoice_id, appointment_id, customer_id, subtotal, invoice_date in invoices:
+            appointment = appointments.get(appointment_id)
+            if appointment is None:
+                continue  # an unknown reference
+            if appointment_id in invoiced:
+                _problem(problems, "invoice/appointment", f"{invoice_id}: {appointment_id} is invoiced twice")
+            invoiced.add(appointment_id)
+            apt_customer, status, total, date = appointment
+            if status != "completed":
+                _problem(problems, "invoice/appointment", f"{invoice_id}: invoices {appointment_id}, which is {status}")
+            if customer_id != apt_customer or invoice_date != date or abs(subtotal - total) > CENT:
+                _problem(problems, "invoice/appointment",
+                         f"{invoice_id}: {customer_id} {invoice_date} {subtotal} vs {appointment_id}'s "
+                         f"{apt_customer} {date} {total}")
+        for appointment_id, (_, status, _, _) in appointments.items():
+            if status == "completed" and appointment_id not in invoiced:
+                _problem(problems, "invoice/appointment", f"{appointment_id}: completed but not invoiced")
+    
+    for table in TABLE_NAMES:
+        if tasks[table]:
+            print(f"  • {table}: {rows[table]:,} rows")
+    for check, (count, examples) in problems.items():
+        print(f"❌ {check}: {count:,}")
+        for example in examples:
+            print(f"    {example}")
+    total_rows = sum(rows.values())
+    if problems:
+        print(f"❌ {sum(count for count, _ in problems.values()):,} problems in {total_rows:,} rows ({lap():.2f} s)")
+    else:
+        print(f"✅ Valid: {total_rows:,} rows ({lap():.2f} s)")
+    return not problems
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Generate GlamorByBee dummy data")
+    parser.add_argument("--customers", type=int,
+                        help=f"number of customers (default: {DEFAULT_CUSTOMERS} times --scale)")
+    parser.add_argument("--appointments", type=int,
+                        help=f"number of appointments (default: {DEFAULT_APPOINTMENTS} times --scale)")
+    parser.add_argument("--scale", type=float, default=1,
+                        help="multiply the default counts, e.g. --scale 1000 for 50k customers / 100k appointments")
+    parser.add_argument("--format", dest="formats", nargs="+", choices=[*OUTPUT_FORMATS, "both"],
+                        help="outputs to write: xlsx (master.xlsx), json (the JSON files, streamed to disk), "
+                             "sqlite (master.db); both means xlsx and json (default: xlsx)")
+    parser.add_argument("--tables", nargs="+", choices=TABLE_NAMES, metavar="TABLE",
+                        help="only generate and write these tables, plus whatever they are built from "
+                             f"(default: all); one of {', '.join(TABLE_NAMES)}")
+    parser.add_argument("--output-dir",
+                        help="write every output (and the manifest) to this directory instead of "
+                             f"the workbook and database here and the JSON files in {JSON_DIR}")
+    parser.add_argument("--stream", action="store_true", help="same as --format json")
+    parser.add_argument("--sqlite", action="store_true", help="same as --format sqlite")
+    parser.add_argument("--append", action="store_true",
+                        help="add --customers/--appointments new rows to the existing master.xlsx "
+                             "and/or JSON files instead of regenerating")
+    parser.add_argument("--write-only", action="store_true",
+                        help="build master.xlsx with a write-only workbook (large exports, >100k rows)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="generate tables and customer/appointment shards in N processes (default: 1)")
+    parser.add_argument("--seed", type=int,
+                        help="random seed; the same seed and --as-of date reproduce the same files "
+                             "(default: the previous run's seed, else random)")
+    parser.add_argument("--as-of", type=lambda value: datetime.strptime(value, "%Y-%m-%d"),
+                        help="date the data is generated relative to, YYYY-MM-DD (default: today)")
+    parser.add_argument("--force", action="store_true",
+                        help=f"regenerate every file, even those {MANIFEST_FILE} says are up to date")
+    parser.add_argument("--backend", choices=BACKENDS, default="python",
+                        help="python: per-record reference generators; numpy: whole columns at once (default: python)")
+    parser.add_argument("--json-format", choices=JSON_FORMATS, default="pretty",
+                        help="pretty: indented .json (default); compact: no whitespace; "
+                             "jsonl: one record per line in .jsonl files")
+    parser.add_argument("--no-indexes", dest="indexes", action="store_false",
+                        help=f"don't write the lookup indexes in {INDEX_DIR}/ (JSON output)")
+    parser.add_argument("--partitioned", action="store_true",
+                        help=f"write {', '.join(PARTITIONED_TABLES)} as a file per month in {PARTITION_DIR}/, "
+                             f"listed in {PARTITION_MANIFEST} (JSON output; no master_data.json)")
+    parser.add_argument("--gzip", action="store_true",
+                        help=f"gzip the monthly files (with --partitioned, level {GZIP_LEVEL})")
+    parser.add_argument("--import-xlsx", nargs="?", const="", metavar="FILE",
+                        help="write the JSON files (in --json-format) from the sheets of a hand-edited workbook "
+                             "(default: master.xlsx), skipping sheets unchanged since the last import")
+    parser.add_argument("--check-backend", action="store_true",
+                        help="compare the numpy backend's column distributions against the reference and exit")
+    parser.add_argument("--validate", action="store_true",
+                        help="check the existing JSON files (in --json-format) for duplicate ids, dangling "
+                             "references, invoice arithmetic and status mismatches in --workers processes, and exit")
+    parser.add_argument("--progress", action=argparse.BooleanOptionalAction, default=sys.stderr.isatty(),
+                        help="show a live progress line on stderr (default: when stderr is a terminal)")
+    parser.add_argument("--profile", choices=PROFILE_MODES,
+                        help=f"run under cProfile (cpu: {PROFILE_FILES['cpu']}) or tracemalloc (memory: "
+                             f"{PROFILE_FILES['memory']}, plus per-stage peaks; several times slower), written "
+                             f"next to {REPORT_FILE}; pool workers aren't profiled")
+    args = parser.parse_args(argv)
+    
+    if args.customers is None:
+        args.customers = round(DEFAULT_CUSTOMERS * args.scale)
+    if args.appointments is None:
+        args.appointments = round(DEFAULT_APPOINTMENTS * args.scale)
+    if args.check_backend:
+        ok = check_backends(max(args.customers, args.appointments, 20000), args.seed or 0, args.as_of)
+        raise SystemExit(0 if ok else 1)
+    
+    args.formats = output_formats(args.formats, args.stream, args.sqlite)
+    if args.append and "sqlite" in args.formats:
+        parser.error("--append works on the xlsx and json outputs")
+    if args.append and args.tables:
+        parser.error("--append always adds to customers, addresses, appointments and invoices; drop --tables")
+    if args.import_xlsx is not None and (args.append or args.partitioned):
+        parser.error("--import-xlsx writes the plain JSON files; drop --append/--partitioned")
+    if args.partitioned and (args.append or "json" not in args.formats):
+        parser.error("--partitioned applies to a regular run of the json output")
+    if args.gzip and not args.partitioned:
+        parser.error("--gzip compresses the monthly files of --partitioned")
+    if args.output_dir:
+        set_output_dir(args.output_dir)
+    if args.validate:
+        raise SystemExit(0 if validate_json_files(args.json_format, args.workers) else 1)
+    
+    # The run report goes next to the outputs: JSON_DIR for the JSON files, else OUTPUT_DIR
+    json_output = (args.import_xlsx is not None or args.formats == ["json"]
+                   or args.formats == ["xlsx"] and not excel_available())
+    report = RunReport(args.progress, args.profile)
+    with report.activate():
+        run(args, report)
+    report.print_summary()
+    for filename in report.save(JSON_DIR if json_output else OUTPUT_DIR):
+        print(f"✅ Created: {filename}")
+
+
+def output_formats(formats=None, stream=False, sqlite=False):
+    """The outputs a command line asks for, in OUTPUT_FORMATS order (default: xlsx)"""
+    formats = set(formats or ())
+    if "both" in formats:
+        formats |= {"xlsx", "json"}
+    if stream:
+        formats.add("json")
+    if sqlite:
+        formats.add("sqlite")
+    return [output for output in OUTPUT_FORMATS if output in formats] or ["xlsx"]
+
+
+def run(args, report=None):
+    """Produce each output the parsed command line asks for, recording into report"""
+    if args.import_xlsx is not None:
+        import_excel_file(args.import_xlsx or output_filename("master.xlsx"), args.json_format, args.indexes,
+                          args.force)
+        return
+    for output in args.formats:
+        if report and len(args.formats) > 1:
+            report.output = output
+        if args.append and output == "json":
+            append_json_files(args.customers, args.appointments, args.seed, args.as_of, args.json_format,
+                              args.indexes)
+        elif args.append:
+            append_excel_file(output_filename("master.xlsx"), args.customers, args.appointments, args.seed,
+                              args.as_of)
+        elif output == "sqlite":
+            create_sqlite_file(output_filename("master.db"), args.customers, args.appointments, args.workers,
+                               args.seed, args.as_of, args.force, args.backend, args.tables)
+        elif output == "json":
+            stream_json_files(args.customers, args.appointments, args.workers, args.seed, args.as_of, args.force,
+                              args.backend, args.json_format, args.indexes, args.tables, args.partitioned,
+                              args.gzip)
+        else:
+            create_excel_file(output_filename("master.xlsx"), args.customers, args.appointments,
+                              write_only=args.write_only, workers=args.workers, seed=args.seed, as_of=args.as_of,
+                              force=args.force, backend=args.backend, tables=args.tables)
 
 
 if __name__ == "__main__":
-    create_excel_file("master.xlsx")
+    main()